@@ -7,16 +7,26 @@ Components:
 - embeddings: Generate vector embeddings for semantic search
 """
 
-from src.feature_extraction.tokenizer import count_tokens, get_token_limit
-from src.feature_extraction.chunker import chunk_content, needs_chunking
-from src.feature_extraction.embeddings import generate_embedding, generate_embeddings_batch, get_embedding_dimensions
+from src.feature_extraction.tokenizer import count_tokens, count_tokens_batch, get_token_limit, truncate_head_tail
+from src.feature_extraction.chunker import chunk_content, chunk_files, needs_chunking
+from src.feature_extraction.embeddings import (
+    generate_embedding, generate_embeddings_batch, generate_embeddings_ndarray, get_embedding_dimensions, is_embeddings_available,
+    quantize_embeddings, dequantize_embeddings
+)
 
 __all__ = [
     'count_tokens',
+    'count_tokens_batch',
     'get_token_limit',
+    'truncate_head_tail',
     'chunk_content',
+    'chunk_files',
     'needs_chunking',
     'generate_embedding',
     'generate_embeddings_batch',
-    'get_embedding_dimensions'
+    'generate_embeddings_ndarray',
+    'get_embedding_dimensions',
+    'is_embeddings_available',
+    'quantize_embeddings',
+    'dequantize_embeddings'
 ]
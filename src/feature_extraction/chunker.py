@@ -15,9 +15,14 @@ Key Concept:
 """
 
 import logging
-from typing import List
+import os
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, repeat
+from typing import Dict, List, Tuple
 
-from src.feature_extraction.tokenizer import count_tokens, get_token_limit
+from src.feature_extraction import tokenizer
+from src.feature_extraction.tokenizer import count_tokens, count_tokens_batch, get_token_limit
 
 # Set up module logger
 logger = logging.getLogger(__name__)
@@ -26,6 +31,13 @@ logger = logging.getLogger(__name__)
 DEFAULT_CHUNK_SIZE = 2000  # tokens per chunk
 DEFAULT_OVERLAP = 200      # overlap between chunks for context
 
+# Source code averages 3-4 characters per token; beyond this many
+# characters per token of the limit, content certainly needs chunking
+_MAX_CHARS_PER_TOKEN = 8
+
+# Below this many files, a process pool costs more than it saves
+PARALLEL_MIN_FILES = 4
+
 
 def needs_chunking(content: str, limit: int = None) -> bool:
     """
@@ -34,6 +46,9 @@ def needs_chunking(content: str, limit: int = None) -> bool:
     LEARNING POINT:
     - Simple threshold check
     - Use conservative limit to leave room for prompt + response
+    - Skip tokenizing when the length alone decides:
+      every token is at least one byte, so short text always fits,
+      and very long text never does
     
     Args:
         content: Text content to check
@@ -45,6 +60,14 @@ def needs_chunking(content: str, limit: int = None) -> bool:
     if limit is None:
         limit = get_token_limit()
     
+    # Cheap length checks first - tokens <= UTF-8 bytes
+    length = len(content)
+    if length <= limit and (content.isascii() or len(content.encode('utf-8')) <= limit):
+        return False
+    if length > limit * _MAX_CHARS_PER_TOKEN:
+        logger.info("Content needs chunking: %d characters > %d limit", length, limit)
+        return True
+    
     token_count = count_tokens(content)
     needs_chunk = token_count > limit
     
@@ -55,7 +78,7 @@ def needs_chunking(content: str, limit: int = None) -> bool:
 
 
 def chunk_by_lines(content: str, chunk_size: int = DEFAULT_CHUNK_SIZE, 
-                   overlap: int = DEFAULT_OVERLAP) -> List[dict]:
+                   overlap: int = DEFAULT_OVERLAP, total_tokens: int = None) -> List[dict]:
     """
     Split content into chunks by lines (simple approach).
     
@@ -63,11 +86,19 @@ def chunk_by_lines(content: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
     - Split at line boundaries (not mid-line)
     - Add overlap so chunks have context from previous chunk
     - Each chunk is a dict with content and metadata
+    - Every line is tokenized ONCE; prefix sums give the token count of
+      any line range, so chunk boundaries are found with binary search
+      instead of re-tokenizing lines (O(N) instead of O(N * overlap))
+    - Overlap is found the same way, so no line lists are rebuilt
+    - Chunk text is sliced straight out of content using line offsets
+    - Callers that already counted the content pass total_tokens, so the
+      whole text is not tokenized a second time just to check the size
     
     Args:
         content: Text content to chunk
         chunk_size: Target tokens per chunk
         overlap: Tokens to overlap between chunks
+        total_tokens: Token count of content, if already known
     
     Returns:
         List of chunk dicts: [{'content': '...', 'tokens': N, 'index': 0}, ...]
@@ -76,7 +107,8 @@ def chunk_by_lines(content: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
         return []
     
     # If content fits in one chunk, return as-is
-    total_tokens = count_tokens(content)
+    if total_tokens is None:
+        total_tokens = count_tokens(content)
     if total_tokens <= chunk_size:
         return [{
             'content': content,
@@ -85,53 +117,87 @@ def chunk_by_lines(content: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
         }]
     
     lines = content.split('\n')
-    chunks = []
-    current_chunk_lines = []
-    current_tokens = 0
+    token_counts = count_tokens_batch(lines)
     
-    for line in lines:
-        line_tokens = count_tokens(line)
-        
-        # If adding this line exceeds chunk size, save current chunk
-        if current_tokens + line_tokens > chunk_size and current_chunk_lines:
-            chunk_content = '\n'.join(current_chunk_lines)
-            chunks.append({
-                'content': chunk_content,
-                'tokens': current_tokens,
-                'index': len(chunks)
-            })
-            
-            # Keep some lines for overlap (context continuity)
-            overlap_tokens = 0
-            overlap_lines = []
-            for prev_line in reversed(current_chunk_lines):
-                prev_tokens = count_tokens(prev_line)
-                if overlap_tokens + prev_tokens > overlap:
-                    break
-                overlap_lines.insert(0, prev_line)
-                overlap_tokens += prev_tokens
-            
-            current_chunk_lines = overlap_lines
-            current_tokens = overlap_tokens
-        
-        current_chunk_lines.append(line)
-        current_tokens += line_tokens
+    # prefix[i] = tokens in lines[0:i], so lines[a:b] has prefix[b] - prefix[a]
+    prefix = [0]
+    prefix.extend(accumulate(token_counts))
     
-    # Don't forget the last chunk
-    if current_chunk_lines:
-        chunk_content = '\n'.join(current_chunk_lines)
+    # offsets[i] = where lines[i] starts in content, so a chunk of lines[a:b]
+    # is the single slice content[offsets[a]:offsets[b] - 1] (no join)
+    offsets = [0]
+    offsets.extend(accumulate(len(line) + 1 for line in lines))
+    
+    bounds = _chunk_bounds(prefix, chunk_size, overlap)
+    
+    # Checked once, not per chunk (the loop can run thousands of times)
+    log_debug = logger.isEnabledFor(logging.DEBUG)
+    
+    # Only now build the dicts (and slice the text) from the line ranges
+    chunks = []
+    last = len(bounds) - 1
+    for index, (start, end) in enumerate(bounds):
+        # The last chunk runs to the end of content (keeps a trailing newline)
+        text = content[offsets[start]:] if index == last else content[offsets[start]:offsets[end] - 1]
         chunks.append({
-            'content': chunk_content,
-            'tokens': count_tokens(chunk_content),
-            'index': len(chunks)
+            'content': text,
+            'tokens': prefix[end] - prefix[start],
+            'index': index
         })
+        if log_debug:
+            logger.debug("Chunk %d: lines %d-%d, %d tokens",
+                         index, start, end - 1, prefix[end] - prefix[start])
     
     logger.info("Split content into %d chunks", len(chunks))
     return chunks
 
 
+def _chunk_bounds(prefix: List[int], chunk_size: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    Compute chunk line ranges from per-line token prefix sums.
+    
+    LEARNING POINT:
+    - Integers in, integers out: all the boundary math lives here, apart
+      from the string slicing and dict building in chunk_by_lines()
+    - Each boundary is a binary search, so this is O(chunks * log(lines))
+    
+    Args:
+        prefix: prefix[i] = tokens in the first i lines (prefix[0] == 0)
+        chunk_size: Target tokens per chunk
+        overlap: Tokens to overlap between chunks
+    
+    Returns:
+        List of (start_line, end_line) half-open ranges, in order;
+        the last range always ends at the last line
+    """
+    line_count = len(prefix) - 1
+    bounds = []
+    start = 0      # First line of current chunk (includes overlap lines)
+    first_new = 0  # First line not in any chunk yet - always included
+    
+    while True:
+        # Furthest line end that keeps the chunk within chunk_size,
+        # but always take at least one new line so we make progress
+        end = bisect_right(prefix, prefix[start] + chunk_size) - 1
+        end = max(end, first_new + 1)
+        if end >= line_count:
+            break
+        
+        bounds.append((start, end))
+        
+        # Keep some lines for overlap (context continuity):
+        # the earliest line such that lines[start:end] fits in `overlap`.
+        # No per-line loop or list building - the next chunk is a slice
+        start = bisect_left(prefix, prefix[end] - overlap, start, end)
+        first_new = end
+    
+    # Don't forget the last chunk (counted like the others - no re-tokenizing)
+    bounds.append((start, line_count))
+    return bounds
+
+
 def chunk_content(content: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
-                  overlap: int = DEFAULT_OVERLAP) -> List[dict]:
+                  overlap: int = DEFAULT_OVERLAP, total_tokens: int = None) -> List[dict]:
     """
     Main chunking function - splits content into manageable pieces.
     
@@ -144,8 +210,60 @@ def chunk_content(content: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
         content: Text content to chunk
         chunk_size: Target tokens per chunk
         overlap: Tokens to overlap between chunks
+        total_tokens: Token count of content, if already known
     
     Returns:
         List of chunk dicts with content, tokens, and index
     """
-    return chunk_by_lines(content, chunk_size, overlap)
+    return chunk_by_lines(content, chunk_size, overlap, total_tokens)
+
+
+def _init_chunk_worker() -> None:
+    """
+    Process pool initializer for chunk_files().
+    
+    Each worker already loads the tokenizer once on import. Limit its batch
+    encoding to one thread: the pool itself provides the parallelism, and
+    N workers x N tokenizer threads would oversubscribe the CPU.
+    """
+    tokenizer.BATCH_THREADS = 1
+
+
+def chunk_files(files: List[Tuple[str, str]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                overlap: int = DEFAULT_OVERLAP, max_workers: int = None) -> Dict[str, List[dict]]:
+    """
+    Chunk many files in parallel using a process pool.
+    
+    LEARNING POINT:
+    - Chunking is CPU-bound Python code, so threads don't help (the GIL)
+    - Each worker process has its own interpreter and GIL, so N workers
+      chunk N files at the same time
+    - Starting processes has a cost, so small batches are chunked inline
+    
+    Args:
+        files: List of (file_path, content) tuples
+        chunk_size: Target tokens per chunk
+        overlap: Tokens to overlap between chunks
+        max_workers: Worker processes (default: number of CPUs)
+    
+    Returns:
+        Dict mapping file_path -> list of chunk dicts (see chunk_content)
+    """
+    if not files:
+        return {}
+    
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    
+    paths = [path for path, _ in files]
+    contents = [content for _, content in files]
+    
+    if max_workers <= 1 or len(files) < PARALLEL_MIN_FILES:
+        results = [chunk_content(content, chunk_size, overlap) for content in contents]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(files)),
+                                 initializer=_init_chunk_worker) as executor:
+            results = list(executor.map(chunk_content, contents, repeat(chunk_size), repeat(overlap)))
+    
+    logger.info("Chunked %d file(s)", len(files))
+    return dict(zip(paths, results))
@@ -12,25 +12,232 @@ Key Concept:
 - Embedding = list of numbers representing meaning
 - Similar text → similar numbers → close in vector space
 - We use these to find "similar code" in our database
+
+Environment variables:
+- DOCGEN_TORCH_THREADS: torch CPU threads for encoding (default: min(8, CPUs))
+- DOCGEN_EMBED_PRECISION: fp32 (default), fp16 (GPU only) or int8 (CPU only)
+- DOCGEN_EMBED_BACKEND: torch (default) or onnx
+  (onnx needs sentence-transformers>=3.2: pip install "sentence-transformers[onnx]")
 """
 
+import importlib.util
 import logging
-from typing import List
+import os
+import threading
+from types import MappingProxyType
+from typing import TYPE_CHECKING, List
 
 # Set up module logger
 logger = logging.getLogger(__name__)
 
-# Import sentence-transformers
-from sentence_transformers import SentenceTransformer
+# Check for sentence-transformers WITHOUT importing it: importing pulls in
+# torch (1-2 s cold), which runs that never embed anything shouldn't pay.
+# The real import happens in _load_model(), on first use
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+SENTENCE_TRANSFORMERS_AVAILABLE = NUMPY_AVAILABLE and importlib.util.find_spec("sentence_transformers") is not None
+if not SENTENCE_TRANSFORMERS_AVAILABLE:
+    logger.warning("sentence-transformers not installed, embeddings unavailable")
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 # Global model cache (avoid reloading)
 _model_cache = {}
 
+# Guards model loading and the one-time flags below (re-entrant: loading
+# configures torch threads while holding it)
+_model_lock = threading.RLock()
+
+# Set once the background warm-up load has been started
+_warm_started = False
+
+# Set once per process - torch only accepts interop threads before first use
+_threads_configured = False
+
 # Default model: fast and good quality, 384 dimensions
 DEFAULT_MODEL = "all-MiniLM-L6-v2"
 
+# Embedding dimensions per model (read-only, built once at import)
+_DIMENSIONS = MappingProxyType({
+    'all-MiniLM-L6-v2': 384,
+    'all-mpnet-base-v2': 768,
+    'paraphrase-MiniLM-L6-v2': 384,
+})
+_DEFAULT_DIMENSIONS = 384
+
+# Supported model precisions (see _resolve_precision)
+EMBED_PRECISIONS = ('fp32', 'fp16', 'int8')
+
+# Supported inference backends (see _load_model)
+EMBED_BACKENDS = ('torch', 'onnx')
+
+# Texts per forward pass in batch encoding
+DEFAULT_BATCH_SIZE = 32
+
+# Storage formats for quantize_embeddings() (bytes per dimension: 4, 2, 1)
+STORAGE_DTYPES = ('float32', 'float16', 'int8')
+
+
+def _require_numpy() -> None:
+    """Raise a clear ImportError (not a NameError on np) when numpy is missing."""
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy is not installed: pip install numpy")
+
+
+def _detect_device() -> str:
+    """
+    Pick the fastest available device: CUDA GPU, then Apple MPS, then CPU.
+    
+    LEARNING POINT:
+    - Encoding on a GPU is often ~10x faster than on CPU
+    - torch is installed with sentence-transformers, but older versions
+      have no MPS backend, so any failure means "use CPU"
+    
+    Returns:
+        Device name: 'cuda', 'mps' or 'cpu'
+    """
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return "cuda"
+        if torch.backends.mps.is_available():
+            return "mps"
+    except Exception:
+        pass
+    return "cpu"
+
+
+def _configure_cpu_threads() -> None:
+    """
+    Give torch a sensible number of CPU threads (once per process).
+    
+    LEARNING POINT:
+    - On CPU, encode() speed depends heavily on torch's thread count
+    - torch's default is often too low in servers/containers, leaving cores idle
+    - 4-8 intra-op threads is the sweet spot for small models like MiniLM
+    - Interop threads can only be set before torch runs any parallel work,
+      so this runs once, right before the first model load
+    """
+    global _threads_configured
+    with _model_lock:
+        if _threads_configured:
+            return
+        _threads_configured = True
+    
+    try:
+        import torch
+        
+        num_threads = int(os.getenv('DOCGEN_TORCH_THREADS', min(8, os.cpu_count() or 1)))
+        torch.set_num_threads(num_threads)
+        torch.set_num_interop_threads(1)
+        logger.debug("torch CPU threads: %d", num_threads)
+    except (ImportError, RuntimeError, ValueError) as e:
+        logger.warning("Could not configure torch threads: %s", e)
+
+
+def _resolve_precision(precision: str, device: str) -> str:
+    """
+    Validate the requested precision for a device, falling back to fp32.
+    
+    LEARNING POINT:
+    - fp16 halves weights and memory traffic; fast on GPUs, slow/unsupported on CPU
+    - int8 (dynamic quantization of Linear layers) is a CPU-only speedup
+    - Both give 2-4x faster encoding with negligible embedding quality loss
+    
+    Args:
+        precision: Requested precision ('fp32', 'fp16' or 'int8')
+        device: Device the model will run on
+    
+    Returns:
+        Precision that will actually be used
+    """
+    if precision not in EMBED_PRECISIONS:
+        logger.warning("Unknown embedding precision '%s', using fp32", precision)
+        return 'fp32'
+    if precision == 'fp16' and device == 'cpu':
+        logger.warning("fp16 is not supported on CPU, using fp32")
+        return 'fp32'
+    if precision == 'int8' and device != 'cpu':
+        logger.warning("int8 is only supported on CPU, using fp32 on %s", device)
+        return 'fp32'
+    return precision
+
+
+def _load_model(model_name: str, device: str, precision: str, backend: str) -> 'SentenceTransformer':
+    """
+    Load a model with the given backend and precision (uncached).
+    
+    LEARNING POINT:
+    - torch backend: weights are loaded into torch; fp16/int8 applied after
+    - onnx backend: sentence-transformers exports the model to ONNX once and
+      then runs it with ONNX Runtime (graph optimizations, memory-mapped
+      weights) - much faster cold start and CPU encoding
+    - Falls back to torch if the ONNX backend is not installed
+    - sentence-transformers (and torch) are imported here, on first load
+    """
+    from sentence_transformers import SentenceTransformer
+    
+    if backend == 'onnx':
+        try:
+            return SentenceTransformer(model_name, device=device, backend='onnx')
+        except Exception as e:
+            # TypeError on sentence-transformers < 3.2, missing optimum/onnxruntime otherwise
+            logger.warning("ONNX backend unavailable (%s), using torch", e)
+    
+    model = SentenceTransformer(model_name, device=device)
+    
+    if precision == 'fp16':
+        model.half()
+    elif precision == 'int8':
+        import torch
+        torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    
+    return model
 
-def _get_model(model_name: str = DEFAULT_MODEL) -> SentenceTransformer:
+
+def _resolve_options(device: str, precision: str, backend: str) -> tuple[str, str, str]:
+    """
+    Fill in defaults and validate device, precision and backend.
+    
+    LEARNING POINT:
+    - Detecting the device imports torch and probes CUDA - too slow to
+      repeat on every embedding call, so _get_model() only calls this
+      when a model has to be loaded (warnings are logged once, there)
+    
+    Args:
+        device: Requested device, or None to auto-detect
+        precision: Requested precision, or None for DOCGEN_EMBED_PRECISION
+        backend: Requested backend, or None for DOCGEN_EMBED_BACKEND
+    
+    Returns:
+        (device, precision, backend) that will actually be used
+    """
+    if device is None:
+        device = _detect_device()
+    if precision is None:
+        precision = os.getenv('DOCGEN_EMBED_PRECISION', 'fp32')
+    precision = _resolve_precision(precision, device)
+    if backend is None:
+        backend = os.getenv('DOCGEN_EMBED_BACKEND', 'torch')
+    if backend not in EMBED_BACKENDS:
+        logger.warning("Unknown embedding backend '%s', using torch", backend)
+        backend = 'torch'
+    if backend == 'onnx' and precision != 'fp32':
+        # fp16/int8 here are torch transforms; ONNX models are quantized at export
+        logger.warning("%s precision applies to the torch backend only, using fp32 ONNX", precision)
+        precision = 'fp32'
+    return device, precision, backend
+
+
+def _get_model(model_name: str = DEFAULT_MODEL, device: str = None,
+               precision: str = None, backend: str = None) -> 'SentenceTransformer':
     """
     Get or load sentence-transformers model (cached).
     
@@ -38,20 +245,91 @@ def _get_model(model_name: str = DEFAULT_MODEL) -> SentenceTransformer:
     - Models are large, loading takes time
     - We cache the model so it's only loaded once
     - all-MiniLM-L6-v2 is fast and good quality
+    - Models are cached under the resolved (device, precision, backend),
+      so forcing CPU (or fp32) does not evict a GPU (or quantized) model
+    - They are ALSO cached under the arguments as passed (None = default),
+      so a repeat call is a single dict lookup: defaults (device detection,
+      DOCGEN_EMBED_* variables) are resolved once, on the first call
+    - On CPU, torch threads are configured before the first load
+    - Double-checked locking: cached models are returned without taking
+      the lock; loads happen under it, so two threads (e.g. the warm-up
+      thread and a real request) never load the same model twice
     
     Args:
         model_name: Name of the model to load
+        device: Device to run on (default: auto-detect)
+        precision: 'fp32', 'fp16' or 'int8' (default: DOCGEN_EMBED_PRECISION or fp32)
+        backend: 'torch' or 'onnx' (default: DOCGEN_EMBED_BACKEND or torch)
     
     Returns:
         Loaded SentenceTransformer model
+    
+    Raises:
+        ImportError: If sentence-transformers is not installed
+    """
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        raise ImportError("sentence-transformers is not installed: pip install sentence-transformers")
+    
+    request_key = (model_name, device, precision, backend)
+    model = _model_cache.get(request_key)
+    if model is not None:
+        return model
+    
+    with _model_lock:
+        # Re-check: another thread may have loaded it while we waited
+        model = _model_cache.get(request_key)
+        if model is None:
+            device, precision, backend = _resolve_options(device, precision, backend)
+            load_key = (model_name, device, precision, backend)
+            model = _model_cache.get(load_key)
+            if model is None:
+                if device == "cpu":
+                    _configure_cpu_threads()
+                logger.info("Loading model: %s on %s (%s, %s)", model_name, device, precision, backend)
+                model = _load_model(model_name, device, precision, backend)
+                _model_cache[load_key] = model
+            _model_cache[request_key] = model
+        return model
+
+
+def _warm_up_model(model_name: str) -> None:
+    """Load a model in the background so the first encode() finds it cached."""
+    try:
+        _get_model(model_name)
+        logger.debug("Model warm-up finished: %s", model_name)
+    except Exception as e:
+        logger.warning("Model warm-up failed for %s: %s", model_name, e)
+
+
+def is_embeddings_available() -> bool:
+    """
+    Check if embeddings can be generated, and start loading the model.
+    
+    LEARNING POINT:
+    - Loading the model takes 1-3 seconds (tokenizer + weights)
+    - Callers check availability well before they embed anything,
+      so we start loading in a background thread right away
+    - By the time the first encode() runs, the model is usually ready
+    - daemon=True: the warm-up thread never blocks interpreter exit
+    
+    Returns:
+        True if sentence-transformers is installed
     """
-    if model_name not in _model_cache:
-        logger.info("Loading model: %s", model_name)
-        _model_cache[model_name] = SentenceTransformer(model_name)
-    return _model_cache[model_name]
+    global _warm_started
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        return False
+    
+    with _model_lock:
+        if _warm_started:
+            return True
+        _warm_started = True
+    
+    threading.Thread(target=_warm_up_model, args=(DEFAULT_MODEL,), daemon=True).start()
+    return True
 
 
-def generate_embedding(text: str, model_name: str = DEFAULT_MODEL) -> List[float]:
+def generate_embedding(text: str, model_name: str = DEFAULT_MODEL,
+                       normalize: bool = True) -> List[float]:
     """
     Generate embedding for text.
     
@@ -59,10 +337,14 @@ def generate_embedding(text: str, model_name: str = DEFAULT_MODEL) -> List[float
     - sentence-transformers runs locally, no API needed
     - Returns numpy array, we convert to list for storage
     - all-MiniLM-L6-v2 produces 384 dimensions
+    - normalize=True returns unit-length vectors (L2 norm = 1), so cosine
+      similarity is a plain dot product - normalized inside encode(),
+      no extra pass over the vectors afterwards
     
     Args:
         text: Text to embed
         model_name: Model to use (default: all-MiniLM-L6-v2)
+        normalize: L2-normalize the embedding (default: True)
     
     Returns:
         List of floats (embedding vector)
@@ -71,7 +353,7 @@ def generate_embedding(text: str, model_name: str = DEFAULT_MODEL) -> List[float
         return []
     
     model = _get_model(model_name)
-    embedding = model.encode(text)
+    embedding = model.encode(text, show_progress_bar=False, normalize_embeddings=normalize)
     
     # Convert numpy array to list for JSON/DB storage
     embedding_list = embedding.tolist()
@@ -80,7 +362,62 @@ def generate_embedding(text: str, model_name: str = DEFAULT_MODEL) -> List[float
     return embedding_list
 
 
-def generate_embeddings_batch(texts: List[str], model_name: str = DEFAULT_MODEL) -> List[List[float]]:
+def generate_embeddings_ndarray(texts: List[str], model_name: str = DEFAULT_MODEL,
+                                batch_size: int = DEFAULT_BATCH_SIZE,
+                                normalize: bool = True) -> 'np.ndarray':
+    """
+    Generate embeddings for multiple texts as one 2-D numpy array.
+    
+    LEARNING POINT:
+    - Python lists of floats cost one object per number (384 per embedding)
+    - A numpy array of shape (N, 384) is one contiguous block of float32
+    - Similarity search (dot products) works directly on the array,
+      so only convert to lists at the JSON/DB boundary
+    - "Smart batching": every text in a batch is padded to the longest one,
+      so encode() sorts texts by length before batching and restores the
+      original order afterwards. We get this for free - no need to sort here
+    - Identical texts (license headers, boilerplate) are embedded once and
+      the vector is copied to every position that had that text
+    
+    Args:
+        texts: List of texts to embed
+        model_name: Model to use
+        batch_size: Texts per forward pass
+        normalize: L2-normalize the embeddings (default: True)
+    
+    Returns:
+        Array of shape (len(texts), dimensions)
+    """
+    if not texts:
+        _require_numpy()
+        return np.empty((0, get_embedding_dimensions(model_name)), dtype=np.float32)
+    
+    # Map each distinct text to its row in the encoded batch (keeps first-seen order)
+    rows = {}
+    positions = [rows.setdefault(text, len(rows)) for text in texts]
+    unique_texts = list(rows) if len(rows) < len(texts) else texts
+    
+    model = _get_model(model_name)
+    embeddings = model.encode(
+        unique_texts,
+        batch_size=batch_size,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=normalize
+    )
+    
+    if unique_texts is not texts:
+        logger.debug("Skipped %d duplicate text(s)", len(texts) - len(unique_texts))
+        # Fancy indexing fans each row out to all of its positions in one copy
+        embeddings = embeddings[positions]
+    logger.info("Generated %d embeddings", len(embeddings))
+    
+    return embeddings
+
+
+def generate_embeddings_batch(texts: List[str], model_name: str = DEFAULT_MODEL,
+                              batch_size: int = DEFAULT_BATCH_SIZE,
+                              normalize: bool = True) -> List[List[float]]:
     """
     Generate embeddings for multiple texts (batch processing).
     
@@ -88,10 +425,13 @@ def generate_embeddings_batch(texts: List[str], model_name: str = DEFAULT_MODEL)
     - Batch processing is more efficient than one-by-one
     - sentence-transformers handles batches natively
     - Uses GPU if available for faster processing
+    - Prefer generate_embeddings_ndarray() when you don't need lists
     
     Args:
         texts: List of texts to embed
         model_name: Model to use
+        batch_size: Texts per forward pass
+        normalize: L2-normalize the embeddings (default: True)
     
     Returns:
         List of embedding vectors
@@ -99,14 +439,66 @@ def generate_embeddings_batch(texts: List[str], model_name: str = DEFAULT_MODEL)
     if not texts:
         return []
     
-    model = _get_model(model_name)
-    embeddings = model.encode(texts)
+    # Convert the whole 2-D array in one call (not row by row)
+    return generate_embeddings_ndarray(texts, model_name, batch_size, normalize).tolist()
+
+
+def quantize_embeddings(embeddings, dtype: str = 'float16') -> tuple['np.ndarray', 'np.ndarray | None']:
+    """
+    Shrink embeddings for storage (float16, or int8 with per-row scales).
     
-    # Convert numpy arrays to lists
-    embeddings_list = [emb.tolist() for emb in embeddings]
-    logger.info("Generated %d embeddings", len(embeddings_list))
+    LEARNING POINT:
+    - float16 halves the bytes of float32 embeddings; for unit-length
+      vectors the cosine similarity changes by ~1e-3 at most
+    - int8 uses symmetric quantization: each row is divided by
+      max(|row|) / 127, so its values fit in -127..127 (4x smaller).
+      The per-row scale is kept to map values back to floats
+    - pgvector can store these directly (halfvec for float16)
     
-    return embeddings_list
+    Args:
+        embeddings: 2-D array or list of vectors (from generate_embeddings_*)
+        dtype: 'float32', 'float16' or 'int8'
+    
+    Returns:
+        (quantized array, per-row scales of shape (N, 1) for int8, else None)
+    
+    Raises:
+        ValueError: If dtype is not one of STORAGE_DTYPES
+        ImportError: If numpy is not installed
+    """
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unknown storage dtype '{dtype}', expected one of {STORAGE_DTYPES}")
+    _require_numpy()
+    
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if dtype != 'int8':
+        return vectors.astype(dtype, copy=False), None
+    
+    scale = np.max(np.abs(vectors), axis=-1, keepdims=True) / 127
+    scale[scale == 0] = 1  # All-zero rows stay zero instead of dividing by 0
+    quantized = np.rint(vectors / scale).astype(np.int8)
+    return quantized, scale
+
+
+def dequantize_embeddings(quantized, scale=None) -> 'np.ndarray':
+    """
+    Turn quantize_embeddings() output back into float32 vectors.
+    
+    Args:
+        quantized: Array from quantize_embeddings()
+        scale: Per-row scales (int8 only)
+    
+    Returns:
+        float32 array with the same shape as quantized
+    
+    Raises:
+        ImportError: If numpy is not installed
+    """
+    _require_numpy()
+    vectors = np.asarray(quantized, dtype=np.float32)
+    if scale is not None:
+        vectors *= scale
+    return vectors
 
 
 def get_embedding_dimensions(model_name: str = DEFAULT_MODEL) -> int:
@@ -124,9 +516,4 @@ def get_embedding_dimensions(model_name: str = DEFAULT_MODEL) -> int:
     Returns:
         Number of dimensions
     """
-    dimensions = {
-        'all-MiniLM-L6-v2': 384,
-        'all-mpnet-base-v2': 768,
-        'paraphrase-MiniLM-L6-v2': 384,
-    }
-    return dimensions.get(model_name, 384)
+    return _DIMENSIONS.get(model_name, _DEFAULT_DIMENSIONS)
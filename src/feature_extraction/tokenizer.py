@@ -15,6 +15,10 @@ Key Concept:
 """
 
 import logging
+import os
+import re
+from types import MappingProxyType
+from typing import List
 
 # Set up module logger
 logger = logging.getLogger(__name__)
@@ -28,16 +32,55 @@ except ImportError:
     TIKTOKEN_AVAILABLE = False
     logger.warning("tiktoken not installed, using approximate token counting")
 
+# Load the encoder ONCE at import time.
+# get_encoding() does a registry lookup and, on first use, loads the BPE
+# ranks from disk - far too expensive to repeat on every count_tokens() call.
+# cl100k_base works for GPT-4, good approximation for Claude
+_ENCODER = None
+if TIKTOKEN_AVAILABLE:
+    try:
+        _ENCODER = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        TIKTOKEN_AVAILABLE = False
+        logger.warning("tiktoken encoding unavailable: %s, using approximate token counting", e)
+
+# Threads for batch encoding (tiktoken releases the GIL while encoding)
+BATCH_THREADS = min(8, os.cpu_count() or 1)
+
 # Token limits for different models (leave room for response)
-TOKEN_LIMITS = {
+# Read-only: these are constants shared by every caller
+TOKEN_LIMITS = MappingProxyType({
     'gpt-4': 8000,
     'gpt-4-turbo': 120000,
     'claude-3': 180000,
     'default': 4000  # Conservative default
-}
+})
+_DEFAULT_TOKEN_LIMIT = TOKEN_LIMITS['default']
+
+# Fallback: BPE tokenizers roughly emit one token per word and one per symbol.
+# Much closer than "characters / 4" for code, which is dense with symbols
+_FALLBACK_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Inserted by truncate_head_tail() where the middle of a text was dropped
+TRUNCATION_MARKER = "\n\n... [truncated] ...\n\n"
+
+# Warn about tiktoken encode failures once, not once per text
+_encode_failure_warned = False
 
-# Fallback: average characters per token
-CHARS_PER_TOKEN = 4
+
+def _estimate_tokens(text: str) -> int:
+    """Fallback token estimate when tiktoken is unavailable (no logging - hot path)."""
+    return len(_FALLBACK_TOKEN_RE.findall(text))
+
+
+def _warn_encode_failure(error: Exception) -> None:
+    """Log a tiktoken encode failure at WARNING once, then at DEBUG."""
+    global _encode_failure_warned
+    if _encode_failure_warned:
+        logger.debug("tiktoken failed: %s, using fallback", error)
+        return
+    _encode_failure_warned = True
+    logger.warning("tiktoken failed: %s, using fallback (further failures logged at DEBUG)", error)
 
 
 def count_tokens(text: str, model: str = "default") -> int:
@@ -47,7 +90,10 @@ def count_tokens(text: str, model: str = "default") -> int:
     LEARNING POINT:
     - tiktoken is OpenAI's tokenizer library
     - cl100k_base encoding works for GPT-4 and approximates Claude
-    - Falls back to character estimation if tiktoken unavailable
+    - The encoder is loaded once at import (see _ENCODER above)
+    - encode_ordinary() treats text like "<|endoftext|>" as plain text:
+      no special-token scan, and source code containing it still counts
+    - Falls back to counting words and symbols if tiktoken unavailable
     
     Args:
         text: Text to count tokens for
@@ -59,23 +105,94 @@ def count_tokens(text: str, model: str = "default") -> int:
     if not text:
         return 0
     
-    if TIKTOKEN_AVAILABLE:
+    if _ENCODER is not None:
         try:
-            # cl100k_base works for GPT-4, good approximation for Claude
-            encoder = tiktoken.get_encoding("cl100k_base")
-            token_count = len(encoder.encode(text))
+            token_count = len(_ENCODER.encode_ordinary(text))
             logger.debug("Counted %d tokens (tiktoken)", token_count)
             return token_count
         except Exception as e:
-            logger.warning("tiktoken failed: %s, using fallback", str(e))
+            _warn_encode_failure(e)
     
     # Fallback: rough estimation
-    # Code has more tokens per character due to symbols
-    token_count = len(text) // CHARS_PER_TOKEN
+    token_count = _estimate_tokens(text)
     logger.debug("Estimated %d tokens (fallback)", token_count)
     return token_count
 
 
+def count_tokens_batch(texts: List[str], model: str = "default") -> List[int]:
+    """
+    Count tokens for many texts in one call.
+    
+    LEARNING POINT:
+    - Calling the tokenizer once per tiny string pays per-call overhead
+    - encode_ordinary_batch() hands the whole list to tiktoken's Rust core,
+      which releases the GIL and encodes on several threads
+    - Same results as calling count_tokens() on each text
+    
+    Args:
+        texts: Texts to count tokens for
+        model: Model name (for future model-specific counting)
+    
+    Returns:
+        List of token counts, one per text (same order)
+    """
+    if not texts:
+        return []
+    
+    if _ENCODER is not None:
+        try:
+            encoded = _ENCODER.encode_ordinary_batch(texts, num_threads=BATCH_THREADS)
+            return [len(tokens) for tokens in encoded]
+        except Exception as e:
+            logger.warning("tiktoken batch failed: %s, counting texts one by one", e)
+            return [count_tokens(text, model) for text in texts]
+    
+    # Fallback: estimate directly - count_tokens() would log once per text
+    return [_estimate_tokens(text) for text in texts]
+
+
+def truncate_head_tail(text: str, head_tokens: int = 2000, tail_tokens: int = 2000) -> str:
+    """
+    Keep only the first and last tokens of a text.
+    
+    LEARNING POINT:
+    - Imports, class/function signatures and the end of a file carry most
+      of what documentation needs; the middle of a huge file rarely does
+    - Cutting on token boundaries (not characters) keeps the result
+      within a predictable token budget
+    - A marker line shows the reader (and the LLM) that text was removed
+    
+    Args:
+        text: Text to shorten
+        head_tokens: Tokens to keep from the start
+        tail_tokens: Tokens to keep from the end
+    
+    Returns:
+        The text itself if it is short enough, otherwise head + marker + tail
+    """
+    if not text:
+        return text
+    
+    if _ENCODER is not None:
+        try:
+            tokens = _ENCODER.encode_ordinary(text)
+            if len(tokens) <= head_tokens + tail_tokens:
+                return text
+            head = _ENCODER.decode(tokens[:head_tokens])
+            tail = _ENCODER.decode(tokens[len(tokens) - tail_tokens:])
+            return head + TRUNCATION_MARKER + tail
+        except Exception as e:
+            _warn_encode_failure(e)
+    
+    # Fallback: cut at the same word/symbol boundaries _estimate_tokens() counts
+    spans = [match.span() for match in _FALLBACK_TOKEN_RE.finditer(text)]
+    if len(spans) <= head_tokens + tail_tokens:
+        return text
+    head_end = spans[head_tokens - 1][1] if head_tokens > 0 else 0
+    tail_start = spans[len(spans) - tail_tokens][0] if tail_tokens > 0 else len(text)
+    return text[:head_end] + TRUNCATION_MARKER + text[tail_start:]
+
+
 def get_token_limit(model: str = "default") -> int:
     """
     Get token limit for a model.
@@ -90,7 +207,7 @@ def get_token_limit(model: str = "default") -> int:
     Returns:
         Token limit for the model
     """
-    return TOKEN_LIMITS.get(model, TOKEN_LIMITS['default'])
+    return TOKEN_LIMITS.get(model, _DEFAULT_TOKEN_LIMIT)
 
 
 def estimate_chunks_needed(text: str, chunk_size: int = 2000) -> int:
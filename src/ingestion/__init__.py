@@ -1,7 +1,13 @@
 """Ingestion module - detects and analyzes code changes."""
 
-from src.ingestion.change_detector import is_git_repo, get_remote_branch
-from src.ingestion.change_analyzer import get_commits_to_push, get_changed_files_to_push, analyze_changes_for_docs
+from src.ingestion.change_detector import is_git_repo, get_remote_branch, GitCommandCache
+from src.ingestion.change_analyzer import get_commits_to_push, get_changed_files_to_push, analyze_changes_for_docs, CHANGE_TYPES
+from src.ingestion.analysis_cache import (
+    is_analysis_cache_enabled, resolve_range_shas, resolve_push_range, make_cache_key, load_cached_analysis, store_cached_analysis
+)
+from src.ingestion.ingest import ingest_push
 
 # Export the function
-__all__ = ['is_git_repo', 'get_remote_branch', 'get_commits_to_push', 'get_changed_files_to_push', 'analyze_changes_for_docs']
\ No newline at end of file
+__all__ = ['is_git_repo', 'get_remote_branch', 'get_commits_to_push', 'get_changed_files_to_push', 'analyze_changes_for_docs', 'CHANGE_TYPES', 'GitCommandCache',
+           'is_analysis_cache_enabled', 'resolve_range_shas', 'resolve_push_range', 'make_cache_key', 'load_cached_analysis', 'store_cached_analysis',
+           'ingest_push']
\ No newline at end of file
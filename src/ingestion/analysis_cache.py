@@ -0,0 +1,270 @@
+"""
+Analysis Cache Module
+
+LEARNING: Caching deterministic results on disk (sqlite3)
+
+What we're building:
+- The analysis of a push only depends on two commits: the remote branch
+  tip and HEAD. Same two SHAs = same changes, every time.
+- So we store analyze_changes_for_docs() results keyed on those SHAs
+  and answer repeat runs (re-push, CI re-run) from disk
+- Invalidation is automatic: any new commit changes the key
+- Entries hold full file contents and diffs, so every store prunes old
+  ones: older than ANALYSIS_CACHE_MAX_AGE, or beyond the newest
+  ANALYSIS_CACHE_MAX_ENTRIES
+
+Environment variables:
+- DOCGEN_CACHE_DIR: Where the cache database lives
+  (default: ~/.cache/doc-gen-agent)
+- DOCGEN_ANALYSIS_CACHE: Set to "0" to turn the cache off
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from src.ingestion import change_analyzer
+from src.ingestion.change_detector import GitCommandCache, get_remote_branch, git_error_message, run_git
+
+# Set up module logger
+logger = logging.getLogger(__name__)
+
+# Try to import orjson (C JSON encoder), fall back to the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Bump whenever the shape of analyze_changes_for_docs() results changes,
+# so entries written by older code are never returned
+ANALYSIS_CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "doc-gen-agent")
+CACHE_DB_NAME = "analysis.sqlite"
+
+# Pruning limits (see _prune): re-runs of recent pushes are what hit
+ANALYSIS_CACHE_MAX_AGE = 14 * 24 * 60 * 60  # seconds
+ANALYSIS_CACHE_MAX_ENTRIES = 100
+
+
+def is_analysis_cache_enabled() -> bool:
+    """Check whether the on-disk analysis cache is turned on (DOCGEN_ANALYSIS_CACHE)."""
+    return os.environ.get("DOCGEN_ANALYSIS_CACHE", "1") != "0"
+
+
+def get_cache_path() -> str:
+    """Get the path of the cache database (DOCGEN_CACHE_DIR or the default)."""
+    cache_dir = os.environ.get("DOCGEN_CACHE_DIR") or DEFAULT_CACHE_DIR
+    return os.path.join(cache_dir, CACHE_DB_NAME)
+
+
+def resolve_range_shas(repo_path: str, remote_branch: str,
+                       git_cache: GitCommandCache | None = None) -> tuple[str, str] | None:
+    """
+    Resolve the remote branch and HEAD to commit SHAs with one git call.
+    
+    LEARNING POINT:
+    - git rev-parse accepts several revisions and prints one SHA per line
+    
+    Args:
+        repo_path: Path to git repository
+        remote_branch: Remote branch name (e.g., "origin/main")
+        git_cache: Optional GitCommandCache shared across one pipeline run
+    
+    Returns:
+        (remote_sha, head_sha), or None if either can't be resolved
+    """
+    result = run_git(["rev-parse", remote_branch, "HEAD"], repo_path,
+                     text=True, check=False, cache=git_cache)
+    if result.returncode != 0:
+        logger.warning("Failed to resolve %s/HEAD: %s", remote_branch, git_error_message(result))
+        return None
+    
+    shas = result.stdout.split()
+    if len(shas) != 2:
+        return None
+    return shas[0], shas[1]
+
+
+def resolve_push_range(repo_path: str,
+                       git_cache: GitCommandCache | None = None) -> tuple[str, tuple[str, str] | None]:
+    """
+    Resolve the upstream branch name and the (remote, HEAD) SHAs with one git call.
+    
+    LEARNING POINT:
+    - rev-parse options only apply to the arguments after them, so
+      "@{u} HEAD --abbrev-ref --symbolic-full-name @{u}" prints both SHAs
+      and then the branch name: one process instead of
+      get_remote_branch() + resolve_range_shas()
+    - Without an upstream the call fails, and the two separate lookups
+      (with get_remote_branch()'s origin/main default) are used instead
+    
+    Args:
+        repo_path: Path to git repository
+        git_cache: Optional GitCommandCache shared across one pipeline run
+    
+    Returns:
+        (remote branch name, (remote_sha, head_sha) or None)
+    """
+    result = run_git(["rev-parse", "@{u}", "HEAD", "--abbrev-ref", "--symbolic-full-name", "@{u}"], repo_path,
+                     text=True, check=False, cache=git_cache)
+    fields = result.stdout.split() if result.returncode == 0 else []
+    if len(fields) == 3:
+        return fields[2], (fields[0], fields[1])
+    
+    remote_branch = get_remote_branch(repo_path)
+    return remote_branch, resolve_range_shas(repo_path, remote_branch, git_cache)
+
+
+def make_cache_key(remote_sha: str, head_sha: str) -> str:
+    """
+    Build the cache key for a commit range.
+    
+    LEARNING POINT:
+    - Options that change the analysis output (cache version, rename
+      detection) are part of the key, so flipping them can't return stale data
+    
+    Args:
+        remote_sha: SHA of the remote branch tip
+        head_sha: SHA of HEAD
+    
+    Returns:
+        Hex digest identifying this analysis
+    """
+    raw = f"{ANALYSIS_CACHE_VERSION}:{change_analyzer.DETECT_RENAMES}:{remote_sha}:{head_sha}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def _dumps(changes: list[dict]) -> str | bytes:
+    """
+    Serialize analysis results to JSON (orjson when available).
+    
+    LEARNING POINT:
+    - orjson encodes in C and returns UTF-8 bytes directly, several times
+      faster than json.dumps() on large diff/content strings
+    - orjson rejects strings that aren't valid UTF-8; paths decoded with
+      surrogateescape can contain those, so such results go through json
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(changes, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(changes)
+
+
+def _loads(payload: str | bytes) -> list[dict]:
+    """Deserialize a cache entry written by _dumps() (str or bytes)."""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(payload)
+        except ValueError:
+            pass  # e.g., a lone surrogate escape only the json module accepts
+    return json.loads(payload)
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database, creating it (and its directory) if needed."""
+    path = get_cache_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    connection = sqlite3.connect(path, timeout=5)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS analysis ("
+        " key TEXT PRIMARY KEY,"
+        " created REAL NOT NULL,"
+        " changes TEXT NOT NULL)"
+    )
+    return connection
+
+
+def load_cached_analysis(key: str) -> list[dict] | None:
+    """
+    Look up a cached analysis result.
+    
+    LEARNING POINT:
+    - A cache must never break the pipeline: any database problem
+      is logged and treated as a miss
+    
+    Args:
+        key: Key from make_cache_key()
+    
+    Returns:
+        The cached list of change dicts, or None on a miss
+    """
+    try:
+        with closing(_connect()) as connection:
+            row = connection.execute(
+                "SELECT changes FROM analysis WHERE key = ?", (key,)
+            ).fetchone()
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Analysis cache unavailable: %s", e)
+        return None
+    
+    if row is None:
+        logger.debug("Analysis cache miss: %s", key)
+        return None
+    
+    try:
+        changes = _loads(row[0])
+    except ValueError as e:
+        logger.warning("Ignoring corrupt analysis cache entry %s: %s", key, e)
+        return None
+    
+    logger.info("Analysis cache hit: %d file(s)", len(changes))
+    return changes
+
+
+def _prune(connection: sqlite3.Connection, now: float) -> int:
+    """
+    Delete expired entries and all but the newest ANALYSIS_CACHE_MAX_ENTRIES.
+    
+    Returns:
+        Number of entries deleted
+    """
+    expired = connection.execute(
+        "DELETE FROM analysis WHERE created < ?", (now - ANALYSIS_CACHE_MAX_AGE,)
+    ).rowcount
+    overflow = connection.execute(
+        "DELETE FROM analysis WHERE key NOT IN"
+        " (SELECT key FROM analysis ORDER BY created DESC LIMIT ?)",
+        (ANALYSIS_CACHE_MAX_ENTRIES,)
+    ).rowcount
+    return expired + overflow
+
+
+def store_cached_analysis(key: str, changes: list[dict]) -> None:
+    """
+    Save an analysis result for later runs.
+    
+    LEARNING POINT:
+    - JSON instead of pickle: the results are plain dicts/lists/strings,
+      and loading JSON can't execute code from a tampered cache file
+    - Stored as text (json) or UTF-8 bytes (orjson); _loads() reads both
+    - Old entries are pruned in the same transaction, so the database
+      can't grow without bound
+    
+    Args:
+        key: Key from make_cache_key()
+        changes: Result of analyze_changes_for_docs()
+    """
+    try:
+        payload = _dumps(changes)
+        now = time.time()
+        with closing(_connect()) as connection:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO analysis (key, created, changes) VALUES (?, ?, ?)",
+                    (key, now, payload)
+                )
+                pruned = _prune(connection, now)
+    except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+        logger.warning("Failed to write analysis cache: %s", e)
+        return
+    
+    logger.debug("Stored analysis cache entry %s (%d file(s)), pruned %d", key, len(changes), pruned)
@@ -10,18 +10,72 @@ What we're building:
 - Handle all edge cases for documentation generation
 """
 
+import io
 import logging
 import os
+import re
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
 
 from src.exceptions import GitNotInstalledError
-from src.ingestion.change_detector import is_git_repo
+from src.ingestion.change_detector import (
+    GitCommandCache, git_error_message, is_git_repo, popen_git, run_git, split_nul_output
+)
 
 # Set up module logger
 logger = logging.getLogger(__name__)
 
+# Map git status codes to human-readable names
+_STATUS_MAP = {
+    'A': 'added',
+    'M': 'modified',
+    'D': 'deleted',
+    'R': 'renamed',
+    'C': 'copied'
+}
 
-def get_commits_to_push(repo_path: str, remote_branch: str) -> list[str]:
+# Every change type analyze_changes_for_docs() can report; a change's
+# 'change_type_id' is its index here (lets callers index tuples, not dicts)
+CHANGE_TYPES = ('added', 'modified', 'deleted', 'renamed', 'copied', 'unknown')
+_CHANGE_TYPE_IDS = {change_type: index for index, change_type in enumerate(CHANGE_TYPES)}
+
+# Every file section of a unified diff starts with this header
+_DIFF_FILE_HEADER = 'diff --git '
+
+# The extended header of a file section ("index ...", "rename to ...")
+# ends at the first of these lines
+_HEADER_END_PREFIXES = ('---', '+++', '@@')
+
+# Byte values of the backslash escapes git uses in quoted paths ('\303' style
+# octal escapes are handled separately)
+_C_ESCAPES = {'a': 7, 'b': 8, 't': 9, 'n': 10, 'v': 11, 'f': 12, 'r': 13, '"': 34, '\\': 92}
+
+# Added/deleted lines of a unified diff (without the +/- prefix),
+# skipping the "+++ b/file" and "--- a/file" headers
+_ADDED_LINE_RE = re.compile(r'^\+(?!\+\+)(.*)$', re.MULTILINE)
+_DELETED_LINE_RE = re.compile(r'^-(?!--)(.*)$', re.MULTILINE)
+
+# Rename detection makes git compare every added file against every deleted
+# one (quadratic). The pipeline handles a rename fine as delete + add, so it's
+# off by default; set True to get 'renamed' entries (50% similarity threshold)
+DETECT_RENAMES = False
+
+# Run the batched git queries at the same time (set False to debug them one by one)
+PARALLEL_GIT_QUERIES = True
+
+# Below this many changed files the queries finish too fast to be worth threads
+PARALLEL_MIN_FILES = 4
+
+
+def _rename_args() -> list[str]:
+    """Rename-detection option for every git diff call (see DETECT_RENAMES)."""
+    return ["--find-renames=50%"] if DETECT_RENAMES else ["--no-renames"]
+
+
+def get_commits_to_push(repo_path: str, remote_branch: str,
+                        git_cache: GitCommandCache | None = None) -> list[str]:
     """
     Get list of commit hashes that will be pushed to remote.
     
@@ -33,6 +87,7 @@ def get_commits_to_push(repo_path: str, remote_branch: str) -> list[str]:
     Args:
         repo_path: Path to git repository
         remote_branch: Remote branch name (e.g., "origin/main")
+        git_cache: Optional GitCommandCache shared across one pipeline run
     
     Returns:
         List of commit hashes (newest first)
@@ -40,38 +95,34 @@ def get_commits_to_push(repo_path: str, remote_branch: str) -> list[str]:
     if not is_git_repo(repo_path):
         return []
     
-    logger.debug("Running command: git log %s..HEAD --format=%%H in %s", remote_branch, repo_path)
-    
-    try:
-        result = subprocess.run(
-            ["git", "log", f"{remote_branch}..HEAD", "--format=%H"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        commits = [c.strip() for c in result.stdout.splitlines() if c.strip()]
-        logger.info("Found %d commit(s) to push", len(commits))
-        return commits
-        
-    except subprocess.CalledProcessError as e:
-        logger.warning("Failed to get commits to push: %s", e.stderr.strip() if e.stderr else "Unknown error")
+    result = run_git(["log", f"{remote_branch}..HEAD", "--format=%H"], repo_path,
+                     text=True, check=False, cache=git_cache)
+    if result.returncode != 0:
+        logger.warning("Failed to get commits to push: %s", git_error_message(result))
         return []
+    
+    commits = result.stdout.split()
+    logger.info("Found %d commit(s) to push", len(commits))
+    return commits
 
 
-def get_changed_files_to_push(repo_path: str, remote_branch: str) -> list[str]:
+def get_changed_files_to_push(repo_path: str, remote_branch: str,
+                              git_cache: GitCommandCache | None = None) -> list[str]:
     """
     Get files that have been changed in commits ready to push.
     
     LEARNING POINT:
-    - git diff --name-only origin/main..HEAD
+    - The paths of "git diff --name-status origin/main..HEAD"
     - Shows all files changed between remote and local HEAD
     - Includes: added, modified, and deleted files
+    - name-status lists the same files as --name-only, so this reuses
+      get_all_change_types(): with a shared git_cache, the analysis later
+      gets its change types without another git process
     
     Args:
         repo_path: Path to git repository
         remote_branch: Remote branch name (e.g., "origin/main")
+        git_cache: Optional GitCommandCache shared across one pipeline run
     
     Returns:
         List of changed file paths (relative to repo root)
@@ -79,24 +130,9 @@ def get_changed_files_to_push(repo_path: str, remote_branch: str) -> list[str]:
     if not is_git_repo(repo_path):
         return []
     
-    logger.debug("Running command: git diff --name-only %s..HEAD in %s", remote_branch, repo_path)
-    
-    try:
-        result = subprocess.run(
-            ["git", "diff", "--name-only", f"{remote_branch}..HEAD"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        files = [f.strip() for f in result.stdout.splitlines() if f.strip()]
-        logger.info("Found %d changed file(s) to push", len(files))
-        return files
-        
-    except subprocess.CalledProcessError as e:
-        logger.warning("Failed to get changed files: %s", e.stderr.strip() if e.stderr else "Unknown error")
-        return []
+    files = list(get_all_change_types(repo_path, remote_branch, git_cache))
+    logger.info("Found %d changed file(s) to push", len(files))
+    return files
 
 
 def get_file_change_type(file_path: str, repo_path: str, remote_branch: str) -> str:
@@ -116,51 +152,34 @@ def get_file_change_type(file_path: str, repo_path: str, remote_branch: str) ->
     Returns:
         Change type: 'added', 'modified', 'deleted', 'renamed', or 'unknown'
     """
-    logger.debug("Running command: git diff --name-status %s..HEAD -- %s", remote_branch, file_path)
-    
-    try:
-        result = subprocess.run(
-            ["git", "diff", "--name-status", f"{remote_branch}..HEAD", "--", file_path],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        output = result.stdout.strip()
-        if not output:
-            logger.debug("No changes found for file: %s", file_path)
-            return "unknown"
-        
-        # First character is the status code
-        status_char = output[0]
-        
-        # Map git status codes to human-readable names
-        status_map = {
-            'A': 'added',
-            'M': 'modified',
-            'D': 'deleted',
-            'R': 'renamed',
-            'C': 'copied'
-        }
-        
-        change_type = status_map.get(status_char, 'unknown')
-        logger.debug("File %s change type: %s", file_path, change_type)
-        return change_type
-        
-    except subprocess.CalledProcessError:
+    result = run_git(["diff", *_rename_args(), "--name-status", f"{remote_branch}..HEAD", "--", file_path], repo_path,
+                     text=True, check=False)
+    if result.returncode != 0:
         logger.warning("Failed to get change type for: %s", file_path)
         return "unknown"
+    
+    output = result.stdout.strip()
+    if not output:
+        logger.debug("No changes found for file: %s", file_path)
+        return "unknown"
+    
+    # First character is the status code
+    status_char = output[0]
+    
+    change_type = _STATUS_MAP.get(status_char, 'unknown')
+    logger.debug("File %s change type: %s", file_path, change_type)
+    return change_type
 
 
-def get_diff_stats(file_path: str, repo_path: str, remote_branch: str) -> dict:
+def get_file_diff(file_path: str, repo_path: str, remote_branch: str) -> str:
     """
-    Get diff statistics (lines added/deleted) for a file.
+    Get the full diff content for a file.
     
     LEARNING POINT:
-    - git diff --numstat gives: added_lines  deleted_lines  filename
-    - More reliable than parsing +/- symbols from diff output
-    - Binary files show "-" instead of numbers
+    - git diff origin/main..HEAD -- file shows changes to be pushed
+    - Output is in unified diff format
+    - For new files, shows all lines as additions (+)
+    - For deleted files, shows all lines as deletions (-)
     
     Args:
         file_path: Path to the file (relative to repo)
@@ -168,76 +187,307 @@ def get_diff_stats(file_path: str, repo_path: str, remote_branch: str) -> dict:
         remote_branch: Remote branch name (e.g., "origin/main")
     
     Returns:
-        Dict with 'added' and 'deleted' line counts
-        Example: {'added': 10, 'deleted': 5}
+        Diff content as string (empty string if no diff)
     """
-    logger.debug("Running command: git diff --numstat %s..HEAD -- %s", remote_branch, file_path)
+    result = run_git(["diff", *_rename_args(), f"{remote_branch}..HEAD", "--", file_path], repo_path,
+                     text=True, check=False)
+    if result.returncode != 0:
+        logger.warning("Failed to get diff for %s: %s", file_path, git_error_message(result))
+        return ""
     
-    try:
-        result = subprocess.run(
-            ["git", "diff", "--numstat", f"{remote_branch}..HEAD", "--", file_path],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        output = result.stdout.strip()
-        if not output:
-            return {'added': 0, 'deleted': 0}
-        
-        # Format: "added_lines\tdeleted_lines\tfilename"
-        # Binary files show: "-\t-\tfilename"
-        parts = output.split('\t')
+    diff = result.stdout
+    logger.debug("Got diff for %s: %d lines", file_path, len(diff.splitlines()))
+    return diff
+
+
+def get_all_change_types(repo_path: str, remote_branch: str,
+                         git_cache: GitCommandCache | None = None) -> dict:
+    """
+    Get the change type of EVERY changed file with a single git call.
+    
+    LEARNING POINT:
+    - Same command as get_file_change_type(), but without "-- file_path"
+    - One subprocess for all files instead of one per file
+    - With -z the output is NUL-separated fields: "M", "path", ... or, for
+      renames/copies, "R100", "old_path", "new_path" (we key by the new
+      path, like --name-only does)
+    
+    Args:
+        repo_path: Path to git repository
+        remote_branch: Remote branch name (e.g., "origin/main")
+        git_cache: Optional GitCommandCache shared across one pipeline run
+    
+    Returns:
+        Dict mapping file path -> change type ('added', 'modified', ...)
+    """
+    result = run_git(["diff", *_rename_args(), "--name-status", "-z", f"{remote_branch}..HEAD"], repo_path,
+                     check=False, cache=git_cache)
+    if result.returncode != 0:
+        logger.warning("Failed to get change types: %s", git_error_message(result))
+        return {}
+    
+    change_types = {}
+    fields = split_nul_output(result.stdout)
+    i = 0
+    while i < len(fields):
+        status_char = fields[i][:1]
+        # Renames and copies have two paths (old, new); everything else one
+        path_count = 2 if status_char in ('R', 'C') else 1
+        i += path_count
+        if i < len(fields):
+            change_types[fields[i]] = _STATUS_MAP.get(status_char, 'unknown')
+        i += 1
+    
+    return change_types
+
+
+def _unquote_path(path: str) -> str:
+    """
+    Undo git's C-style quoting of a path in diff output.
+    
+    LEARNING POINT:
+    - core.quotePath=false only stops git escaping non-ASCII bytes;
+      a path containing '"', '\\' or a control character (tab, newline...)
+      is still written as "a/x\\"y", with backslash escapes
+    - Escapes are bytes (\\303\\251 is one UTF-8 character), so they're
+      decoded the same way as the -z file list (surrogateescape)
+    
+    Args:
+        path: Path as written by git, quoted or not
+    
+    Returns:
+        The path's real name (unchanged if it wasn't quoted)
+    """
+    if len(path) < 2 or path[0] != '"' or path[-1] != '"':
+        return path
+    
+    raw = bytearray()
+    index = 1
+    end = len(path) - 1
+    while index < end:
+        char = path[index]
+        if char != '\\':
+            raw += char.encode('utf-8', 'surrogateescape')
+            index += 1
+        elif path[index + 1] in '01234567':
+            raw.append(int(path[index + 1:index + 4], 8) & 0xFF)
+            index += 4
+        else:
+            raw.append(_C_ESCAPES.get(path[index + 1], ord(path[index + 1])))
+            index += 2
+    return raw.decode('utf-8', 'surrogateescape')
+
+
+def _quoted_prefix_length(names: str) -> int:
+    """Length of the quoted path that starts names (up to its closing quote)."""
+    index = 1
+    while index < len(names):
+        if names[index] == '\\':
+            index += 2
+        elif names[index] == '"':
+            return index + 1
+        else:
+            index += 1
+    return len(names)
+
+
+def _diff_header_path(header: str) -> str:
+    """
+    Get the (new) file path from a "diff --git a/<old> b/<new>" header.
+    
+    When old == new (everything except renames) the header is symmetric,
+    which lets us split it correctly even if the path contains " b/".
+    Either side may be C-quoted ("b/x\\ty"); a quoted path is unquoted
+    before its "b/" prefix is dropped.
+    """
+    names = header[len(_DIFF_FILE_HEADER):]
+    if names.startswith('"'):
+        new = names[_quoted_prefix_length(names) + 1:]
+        return _unquote_path(new).removeprefix('b/')
+    if names.endswith('"'):
+        # Unquoted paths never contain '"', so the quoted new path starts at the first one
+        return _unquote_path(names[names.index(' "') + 1:]).removeprefix('b/')
+    
+    half = (len(names) - 5) // 2
+    if names[:2] == 'a/' and names[2:2 + half] == names[5 + half:] and names[2 + half:5 + half] == ' b/':
+        return names[2:2 + half]
+    return names.rsplit(' b/', 1)[-1]
+
+
+def iter_file_diffs(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Group the lines of a multi-file unified diff into one diff per file,
+    parsing each file's added/deleted lines along the way.
+    
+    LEARNING POINT:
+    - A repo-wide "git diff" is just the per-file diffs concatenated
+    - Each file's section starts with a "diff --git a/... b/..." line
+    - So one git call + grouping == N per-file git calls
+    - Works line by line, so it can consume git's output while it is
+      still being produced (only the current file is held here)
+    - Only lines after the first "@@" are classified: inside a hunk, every
+      "+"/"-" line is a change (even "+++x" or "--- comment"), so the
+      counts are exactly what --numstat reports - no separate call needed
+    - Binary files ("Binary files ... differ") have no hunks: 0/0
+    - Lines must be split on "\n" only (git's line ending): a bare "\r"
+      stays inside its line, and a CRLF line's "\r" is dropped from
+      parsed_diff along with the "\n" (the diff text keeps both)
+    
+    Args:
+        lines: Diff lines, each ending with its newline
+    
+    Yields:
+        Dicts, in diff order, with:
+        - file_path: Path of the file (new path for renames)
+        - diff: That file's diff text
+        - parsed_diff: {'added': [...], 'deleted': [...]}
+        - stats: {'added': N, 'deleted': N}
+    """
+    path = None
+    section = []
+    added = []
+    deleted = []
+    in_header = False
+    in_hunks = False
+    
+    def finish():
+        return {
+            'file_path': path,
+            'diff': ''.join(section),
+            'parsed_diff': {'added': added, 'deleted': deleted},
+            'stats': {'added': len(added), 'deleted': len(deleted)}
+        }
+    
+    for line in lines:
+        if line.startswith(_DIFF_FILE_HEADER):
+            if path is not None:
+                yield finish()
+            path = _diff_header_path(line.rstrip('\n'))
+            section = [line]
+            added = []
+            deleted = []
+            in_header = True
+            in_hunks = False
+            continue
         
-        # Handle binary files (shown as "-")
-        added = int(parts[0]) if parts[0] != '-' else 0
-        deleted = int(parts[1]) if parts[1] != '-' else 0
+        if path is None:
+            continue
+        section.append(line)
         
-        logger.debug("File %s: +%d -%d lines", file_path, added, deleted)
-        return {'added': added, 'deleted': deleted}
+        if in_hunks:
+            first = line[:1]
+            if first == '+':
+                added.append(line[1:].rstrip('\n').removesuffix('\r'))
+            elif first == '-':
+                deleted.append(line[1:].rstrip('\n').removesuffix('\r'))
+            continue
         
-    except (subprocess.CalledProcessError, IndexError, ValueError) as e:
-        logger.warning("Failed to get diff stats for %s: %s", file_path, str(e))
-        return {'added': 0, 'deleted': 0}
+        if line.startswith('@@'):
+            in_hunks = True
+            in_header = False
+        # Renames: trust git's explicit "rename to" line over header parsing
+        elif in_header:
+            if line.startswith('rename to '):
+                path = _unquote_path(line[len('rename to '):].rstrip('\n'))
+                in_header = False
+            elif line.startswith(_HEADER_END_PREFIXES):
+                in_header = False
+    
+    if path is not None:
+        yield finish()
 
 
-def get_file_diff(file_path: str, repo_path: str, remote_branch: str) -> str:
+def split_diff_by_file(diff: str) -> dict:
     """
-    Get the full diff content for a file.
+    Split a multi-file unified diff (already in memory) into one diff per file.
+    
+    Args:
+        diff: Diff content for many files
+    
+    Returns:
+        Dict mapping file path -> that file's diff text
+    """
+    return {
+        file_diff['file_path']: file_diff['diff']
+        for file_diff in iter_file_diffs(io.StringIO(diff))
+    }
+
+
+def get_all_diffs(repo_path: str, remote_branch: str,
+                  git_cache: GitCommandCache | None = None) -> dict:
+    """
+    Get the diff, parsed lines and line counts of EVERY changed file
+    with a single git call.
     
     LEARNING POINT:
-    - git diff origin/main..HEAD -- file shows changes to be pushed
-    - Output is in unified diff format
-    - For new files, shows all lines as additions (+)
-    - For deleted files, shows all lines as deletions (-)
+    - "git diff origin/main..HEAD" without a path = the whole patch
+    - The patch is streamed from git's stdout through iter_file_diffs(),
+      so the whole thing never sits in memory as one giant string
+      (plus a second copy when splitting it)
+    - The line counts come out of the same pass, which replaces the
+      separate "git diff --numstat" call
+    - TextIOWrapper(newline='\n') splits lines on "\n" only and keeps
+      "\r" as content, so CRLF and bare-CR files come through unchanged;
+      errors='replace' keeps a non-UTF-8 file from failing the whole diff
+    - core.quotePath=false keeps non-ASCII paths unquoted in the headers,
+      so they match the -z file list; paths with '"', '\\' or control
+      characters are still quoted, and _diff_header_path() unquotes them
+    - The output format is pinned (no color, no external diff driver,
+      a/ and b/ prefixes), so user config like color.ui=always or
+      diff.noprefix=true can't break the header parsing
+    - A stream can't be replayed, so git_cache stores the per-file dict
     
     Args:
-        file_path: Path to the file (relative to repo)
         repo_path: Path to git repository
         remote_branch: Remote branch name (e.g., "origin/main")
+        git_cache: Optional GitCommandCache shared across one pipeline run
     
     Returns:
-        Diff content as string (empty string if no diff)
+        Dict mapping file path -> {'diff': ..., 'parsed_diff': ..., 'stats': ...}
+        (see iter_file_diffs)
     """
-    logger.debug("Running command: git diff %s..HEAD -- %s", remote_branch, file_path)
+    args = ["-c", "core.quotePath=false", "diff", "--no-color", "--no-ext-diff",
+            "--src-prefix=a/", "--dst-prefix=b/", *_rename_args(), f"{remote_branch}..HEAD"]
     
-    try:
-        result = subprocess.run(
-            ["git", "diff", f"{remote_branch}..HEAD", "--", file_path],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        diff = result.stdout
-        logger.debug("Got diff for %s: %d lines", file_path, len(diff.splitlines()))
-        return diff
+    if git_cache is not None:
+        key = (os.path.realpath(repo_path), tuple(args), 'file_diffs')
+        file_diffs = git_cache.memoize(key, lambda: _stream_file_diffs(args, repo_path),
+                                       cache_if=lambda value: value is not None)
+    else:
+        file_diffs = _stream_file_diffs(args, repo_path)
+    
+    return file_diffs if file_diffs is not None else {}
+
+
+def _stream_file_diffs(args: list[str], repo_path: str) -> dict | None:
+    """
+    Run a git diff command and group its streamed output per file.
+    
+    LEARNING POINT:
+    - stderr is drained by a thread while stdout is read: if git fills
+      the stderr pipe (lots of warnings) before stdout ends, reading
+      stderr only afterwards would deadlock both processes
+    
+    Returns:
+        Dict mapping file path -> iter_file_diffs() entry, or None if git failed
+    """
+    process = popen_git(args, repo_path)
+    
+    with process:
+        stderr_chunks = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
         
-    except subprocess.CalledProcessError as e:
-        logger.warning("Failed to get diff for %s: %s", file_path, e.stderr.strip() if e.stderr else "Unknown error")
-        return ""
+        stdout = io.TextIOWrapper(process.stdout, encoding='utf-8', errors='replace', newline='\n')
+        file_diffs = {file_diff['file_path']: file_diff for file_diff in iter_file_diffs(stdout)}
+        stderr_reader.join()
+    
+    if process.returncode != 0:
+        stderr = b"".join(stderr_chunks).decode('utf-8', 'replace').strip()
+        logger.warning("Failed to get diffs: %s", stderr or "Unknown error")
+        return None
+    
+    return file_diffs
 
 
 def parse_diff(diff: str) -> dict:
@@ -250,6 +500,8 @@ def parse_diff(diff: str) -> dict:
       - Lines starting with "-" are deletions (except "---" header)
       - Lines starting with "@@" are hunk headers (line numbers)
       - Lines starting with " " (space) are context lines
+    - The "+++"/"---" exclusions are lookaheads in the regexes; other
+      header lines ("diff ", "index ", "@@") never start with +/-
     
     Args:
         diff: Diff content in unified diff format
@@ -258,41 +510,53 @@ def parse_diff(diff: str) -> dict:
         Dict with 'added' and 'deleted' lists of line content
         Example: {'added': ['new line 1', 'new line 2'], 'deleted': ['old line']}
     """
-    added = []
-    deleted = []
-    
-    for line in diff.splitlines():
-        # Skip diff headers
-        # "+++" marks the new file in header
-        # "---" marks the old file in header  
-        # "@@" marks hunk headers with line numbers
-        if line.startswith('+++') or line.startswith('---') or line.startswith('@@'):
-            continue
-        
-        # Skip other header lines (diff --git, index, etc.)
-        if line.startswith('diff ') or line.startswith('index '):
-            continue
-        
-        # Parse actual changes
-        if line.startswith('+'):
-            # Remove the '+' prefix to get actual line content
-            added.append(line[1:])
-        elif line.startswith('-'):
-            # Remove the '-' prefix to get actual line content
-            deleted.append(line[1:])
-        # Lines starting with space are context (unchanged) - we ignore them
+    # One C-level regex scan per list instead of several startswith() per line
+    added = _ADDED_LINE_RE.findall(diff)
+    deleted = _DELETED_LINE_RE.findall(diff)
     
     logger.debug("Parsed diff: %d added, %d deleted lines", len(added), len(deleted))
     return {'added': added, 'deleted': deleted}
 
 
+def get_file_bytes(file_path: str, repo_path: str) -> bytes:
+    """
+    Read the current raw bytes of a file from the working tree.
+    
+    LEARNING POINT:
+    - Binary mode skips the UTF-8 decoder entirely; hashing wants bytes anyway
+    - Binary files are not an error here, they just come back as bytes
+    - read() on a binary file sizes its buffer from fstat() and reads the
+      whole file in one go, so there's no need for os.pread tricks
+    
+    Args:
+        file_path: Path to the file (relative to repo)
+        repo_path: Path to git repository
+    
+    Returns:
+        File content as bytes (empty if the file doesn't exist or can't be read)
+    """
+    full_path = os.path.join(repo_path, file_path)
+    
+    try:
+        with open(full_path, 'rb') as f:
+            data = f.read()
+            logger.debug("Read file %s: %d bytes", file_path, len(data))
+            return data
+    except FileNotFoundError:
+        logger.warning("File not found: %s", full_path)
+        return b""
+    except OSError as e:
+        logger.error("Error reading file %s: %s", file_path, e)
+        return b""
+
+
 def get_file_content(file_path: str, repo_path: str) -> str:
     """
     Read the current content of a file from the repository.
     
     LEARNING POINT:
     - For new files or when you need full content (not just diff)
-    - Uses Python's built-in file reading
+    - Reads bytes via get_file_bytes(), then decodes once
     - Handles encoding issues gracefully
     
     Args:
@@ -302,25 +566,166 @@ def get_file_content(file_path: str, repo_path: str) -> str:
     Returns:
         File content as string (empty string if file doesn't exist or can't be read)
     """
-    full_path = os.path.join(repo_path, file_path)
-    
     try:
-        with open(full_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            logger.debug("Read file %s: %d characters", file_path, len(content))
-            return content
-    except FileNotFoundError:
-        logger.warning("File not found: %s", full_path)
-        return ""
+        # Universal newlines, like reading in text mode
+        content = get_file_bytes(file_path, repo_path).decode('utf-8')
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
     except UnicodeDecodeError:
         logger.warning("Cannot read binary file: %s", file_path)
         return ""
-    except IOError as e:
-        logger.error("Error reading file %s: %s", file_path, str(e))
-        return ""
+    
+    logger.debug("Read file %s: %d characters", file_path, len(content))
+    return content
+
+
+class GitCatFile:
+    """
+    Long-running "git cat-file --batch" process for reading file contents.
+    
+    LEARNING POINT:
+    - Starting a process per file (git show, open()) costs far more than
+      the read itself; one persistent process answers every request
+    - Protocol: write "<rev>:<path>\n" to stdin, git replies with
+      "<sha> blob <size>\n", then exactly <size> bytes, then "\n"
+      (or "<rev>:<path> missing\n" if there is no such object)
+    - Reads from the commit being analyzed, not the working tree, so
+      uncommitted edits can't leak in (and it works on bare repos)
+    
+    Usage:
+        with GitCatFile(repo_path) as catfile:
+            content = catfile.get("HEAD", "src/main.py")
+    """
+    
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._process = None
+    
+    def __enter__(self):
+        return self
+    
+    def _start(self) -> None:
+        """Start the git process (on the first get(), so unused instances cost nothing)."""
+        logger.debug("Starting git cat-file --batch in %s", self.repo_path)
+        try:
+            self._process = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.repo_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            raise GitNotInstalledError()
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def close(self) -> None:
+        """Stop the git process (closing stdin makes it exit)."""
+        if self._process is None:
+            return
+        self._process.stdin.close()
+        self._process.wait()
+        self._process.stdout.close()
+        self._process = None
+    
+    def _abandon(self, reason: str) -> None:
+        """Kill a process that stopped answering; the next get() starts a fresh one."""
+        logger.warning("git cat-file stopped responding (%s); restarting it", reason)
+        process, self._process = self._process, None
+        process.kill()
+        process.wait()
+        for pipe in (process.stdin, process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+    
+    def get_bytes(self, rev: str, path: str) -> bytes:
+        """
+        Read a file's raw bytes at a given revision.
+        
+        LEARNING POINT:
+        - No text decoding: use this when the content will be hashed or
+          otherwise treated as bytes (binary files come back as-is)
+        - If git dies mid-run (killed, out of memory...), the pipe breaks or
+          readline() returns b"": that file comes back empty with a warning,
+          and the next call starts a new process instead of failing forever
+        
+        Args:
+            rev: Revision to read from (e.g., "HEAD")
+            path: Path to the file (relative to repo)
+        
+        Returns:
+            File content as bytes (empty if missing or not a file)
+        """
+        if '\n' in path:
+            # The request is one line; a newline would desync the protocol
+            logger.warning("Cannot read path containing a newline: %r", path)
+            return b""
+        
+        if self._process is None:
+            self._start()
+        
+        try:
+            self._process.stdin.write(f"{rev}:{path}\n".encode('utf-8', 'surrogateescape'))
+            self._process.stdin.flush()
+            header = self._process.stdout.readline()
+        except OSError as e:
+            # BrokenPipeError: the process is gone
+            self._abandon(str(e))
+            return b""
+        
+        if header.endswith((b" missing\n", b" ambiguous\n")):
+            # "<object> missing" - no content follows. Checked before
+            # splitting: the echoed <object> may itself contain spaces
+            logger.warning("File not found: %s:%s", rev, path)
+            return b""
+        
+        # "<sha> <type> <size>" - anything else (b"" at EOF) means git is gone
+        fields = header.rstrip(b"\n").rsplit(b" ", 2)
+        if not header.endswith(b"\n") or len(fields) != 3 or not fields[2].isdigit():
+            self._abandon(f"unexpected reply {header!r} for {rev}:{path}")
+            return b""
+        
+        _, object_type, size = fields
+        data = self._process.stdout.read(int(size) + 1)
+        if len(data) != int(size) + 1:
+            self._abandon(f"short read for {rev}:{path}")
+            return b""
+        data = data[:-1]
+        
+        if object_type != b'blob':
+            logger.warning("Not a file: %s:%s (%s)", rev, path, object_type.decode('ascii', 'replace'))
+            return b""
+        
+        return data
+    
+    def get(self, rev: str, path: str) -> str:
+        """
+        Read a file's content at a given revision as text.
+        
+        Args:
+            rev: Revision to read from (e.g., "HEAD")
+            path: Path to the file (relative to repo)
+        
+        Returns:
+            File content as string (empty string if missing, not a file,
+            or binary)
+        """
+        try:
+            content = self.get_bytes(rev, path).decode('utf-8')
+        except UnicodeDecodeError:
+            logger.warning("Cannot read binary file: %s", path)
+            return ""
+        
+        logger.debug("Read file %s: %d characters", path, len(content))
+        return content
 
 
-def analyze_changes_for_docs(repo_path: str, remote_branch: str) -> list[dict]:
+def analyze_changes_for_docs(repo_path: str, remote_branch: str,
+                             git_cache: GitCommandCache | None = None) -> list[dict]:
     """
     Analyze all changes and prepare data for documentation generation.
     
@@ -329,15 +734,28 @@ def analyze_changes_for_docs(repo_path: str, remote_branch: str) -> list[dict]:
     - Returns structured data ready for doc generation
     - Handles all change types appropriately
     - remote_branch is passed once from orchestrator (DRY principle)
+    - Batched: 2 git calls in total, no matter how many files changed
+      (instead of 3 per file: name-status, numstat and diff); the file
+      list is name-status's paths, and the line counts and parsed lines
+      come from streaming the diff
+    - File contents come from HEAD through one GitCatFile process, as
+      exact bytes for every change type (a file's line endings and
+      token count don't depend on whether it was added or modified)
+    - The batched queries don't depend on each other, so they run
+      in threads at the same time (the GIL is released while waiting on git)
+    - Pass the pipeline's git_cache so the file list fetched in an earlier
+      step (and any repeated analysis) doesn't re-run git
     
     Args:
         repo_path: Path to git repository
         remote_branch: Remote branch name (e.g., "origin/main")
+        git_cache: Optional GitCommandCache shared across one pipeline run
     
     Returns:
         List of dicts, each containing:
         - file_path: Path to the file
         - change_type: 'added', 'modified', 'deleted'
+        - change_type_id: Index of change_type in CHANGE_TYPES
         - stats: {'added': N, 'deleted': N}
         - diff: Full diff content
         - parsed_diff: {'added': [...], 'deleted': [...]}
@@ -347,37 +765,59 @@ def analyze_changes_for_docs(repo_path: str, remote_branch: str) -> list[dict]:
         logger.error("Not a git repository: %s", repo_path)
         return []
     
-    changed_files = get_changed_files_to_push(repo_path, remote_branch)
+    # The file list and the change types come from the same git call
+    if git_cache is None:
+        git_cache = GitCommandCache()
+    changed_files = get_changed_files_to_push(repo_path, remote_branch, git_cache)
     
     if not changed_files:
         logger.info("No files to analyze")
         return []
     
+    # One git call each, covering all files
+    queries = (get_all_change_types, get_all_diffs)
+    if PARALLEL_GIT_QUERIES and len(changed_files) >= PARALLEL_MIN_FILES:
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = [executor.submit(query, repo_path, remote_branch, git_cache) for query in queries]
+            change_types, all_diffs = [future.result() for future in futures]
+    else:
+        change_types, all_diffs = [query(repo_path, remote_branch, git_cache) for query in queries]
+    
     results = []
     
-    for file_path in changed_files:
-        change_type = get_file_change_type(file_path, repo_path, remote_branch)
-        stats = get_diff_stats(file_path, repo_path, remote_branch)
-        diff = get_file_diff(file_path, repo_path, remote_branch)
-        parsed_diff = parse_diff(diff)
-        
-        # Get file content for added/modified files (not deleted)
-        content = ""
-        if change_type != 'deleted':
-            content = get_file_content(file_path, repo_path)
-        
-        results.append({
-            'file_path': file_path,
-            'change_type': change_type,
-            'stats': stats,
-            'diff': diff,
-            'parsed_diff': parsed_diff,
-            'content': content
-        })
-        
-        logger.info(
-            "Analyzed %s: %s (+%d/-%d lines)",
-            file_path, change_type, stats['added'], stats['deleted']
-        )
+    with GitCatFile(repo_path) as catfile:
+        for file_path in changed_files:
+            change_type = change_types.get(file_path, 'unknown')
+            file_diff = all_diffs.get(file_path)
+            if file_diff is not None:
+                diff = file_diff['diff']
+                parsed_diff = file_diff['parsed_diff']
+                stats = file_diff['stats']
+            else:
+                # Every changed file has a section in the combined diff
+                logger.warning("No diff found for %s", file_path)
+                diff = ''
+                parsed_diff = {'added': [], 'deleted': []}
+                stats = {'added': 0, 'deleted': 0}
+            
+            # Get file content for added/modified files (not deleted)
+            content = ""
+            if change_type != 'deleted':
+                content = catfile.get("HEAD", file_path)
+            
+            results.append({
+                'file_path': file_path,
+                'change_type': change_type,
+                'change_type_id': _CHANGE_TYPE_IDS[change_type],
+                'stats': stats,
+                'diff': diff,
+                'parsed_diff': parsed_diff,
+                'content': content
+            })
+            
+            logger.info(
+                "Analyzed %s: %s (+%d/-%d lines)",
+                file_path, change_type, stats['added'], stats['deleted']
+            )
     
     return results
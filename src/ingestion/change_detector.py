@@ -11,7 +11,10 @@ What we're building:
 """
 
 import logging
+import os
 import subprocess
+import threading
+from functools import lru_cache
 from pathlib import Path
 
 from src.exceptions import GitNotInstalledError, InvalidRepositoryError
@@ -19,15 +22,225 @@ from src.exceptions import GitNotInstalledError, InvalidRepositoryError
 # Set up module logger
 logger = logging.getLogger(__name__)
 
+# Files under .git whose mtimes invalidate the is_git_repo()/get_remote_branch() caches
+_REPO_STATE_FILES = ("HEAD", "config", "FETCH_HEAD")
+
+
+def run_git(args: list[str], repo_path: str, text: bool = False,
+            check: bool = True, cache: "GitCommandCache | None" = None) -> subprocess.CompletedProcess:
+    """
+    Run one git command in a repository and capture its output.
+    
+    LEARNING POINT:
+    - Every git call in the ingestion package goes through here, so the
+      argv building, logging and "git not installed" handling live in one place
+    - Output is bytes by default (paths may not be valid UTF-8 - see
+      split_nul_output); pass text=True for plain text output
+    - check=True raises subprocess.CalledProcessError on a non-zero exit
+    - With a GitCommandCache, an identical earlier call is answered from memory
+    
+    Args:
+        args: Git arguments without the leading "git" (e.g., ["diff", "--numstat"])
+        repo_path: Path to git repository (used as the working directory)
+        text: Decode stdout/stderr to str
+        check: Raise CalledProcessError if git fails
+        cache: Optional GitCommandCache to reuse results from
+    
+    Returns:
+        subprocess.CompletedProcess with stdout/stderr captured
+    
+    Raises:
+        GitNotInstalledError: If git is not installed on the system
+        subprocess.CalledProcessError: If check=True and git fails
+    """
+    if cache is not None:
+        return cache.run(args, repo_path, text=text, check=check)
+    
+    argv = ["git", *args]
+    logger.debug("Running command: %s in %s", " ".join(argv), repo_path)
+    
+    try:
+        return subprocess.run(argv, cwd=repo_path, capture_output=True, text=text, check=check)
+    except FileNotFoundError:
+        # FileNotFoundError is raised ONLY when the 'git' executable is not found
+        logger.error("Git is not installed on this system")
+        raise GitNotInstalledError()
+
+
+class GitCommandCache:
+    """
+    Remembers the results of git commands for the lifetime of one run.
+    
+    LEARNING POINT:
+    - Within a pipeline run nothing writes to the repo, so the same git
+      command always gives the same answer - no need to run it twice
+    - Keyed on (resolved repo path, argv, output kind)
+    - Request coalescing: if two threads ask for the same command at the
+      same time, one runs it and the other waits for that result
+    - Failed commands (non-zero exit or exception) are not cached,
+      so they are retried
+    
+    Usage:
+        cache = GitCommandCache()
+        run_git(["log", "--format=%H"], repo_path, cache=cache)
+    """
+    
+    def __init__(self):
+        self._results = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+    
+    def memoize(self, key: tuple, compute, cache_if=None):
+        """
+        Return the cached value for key, calling compute() the first time.
+        
+        Args:
+            key: Hashable cache key
+            compute: Zero-argument function producing the value
+            cache_if: Optional predicate; values it rejects are returned
+                but not stored
+        
+        Returns:
+            The (possibly cached) value
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        # Only callers of the SAME key wait on each other
+        with key_lock:
+            if key in self._results:
+                logger.debug("Git cache hit: %s", key[1])
+                return self._results[key]
+            value = compute()
+            if cache_if is None or cache_if(value):
+                self._results[key] = value
+            return value
+    
+    def run(self, args: list[str], repo_path: str, text: bool = False,
+            check: bool = True) -> subprocess.CompletedProcess:
+        """Cached version of run_git() (same arguments)."""
+        key = (os.path.realpath(repo_path), tuple(args), text, check)
+        return self.memoize(key, lambda: run_git(args, repo_path, text=text, check=check),
+                            cache_if=lambda result: result.returncode == 0)
+    
+    def clear(self) -> None:
+        """Forget everything (call after anything that writes to the repo)."""
+        with self._lock:
+            self._results.clear()
+            self._key_locks.clear()
+
+
+def git_error_message(result: subprocess.CompletedProcess) -> str:
+    """
+    Get a printable error message from a failed git command.
+    
+    LEARNING POINT:
+    - Callers run git with check=False and test result.returncode, instead
+      of raising and catching CalledProcessError for an expected failure
+    
+    Args:
+        result: Completed git command (text or bytes output)
+    
+    Returns:
+        git's stderr, stripped ("Unknown error" if empty)
+    """
+    stderr = result.stderr
+    if isinstance(stderr, bytes):
+        stderr = stderr.decode('utf-8', 'replace')
+    return stderr.strip() if stderr else "Unknown error"
+
+
+def popen_git(args: list[str], repo_path: str) -> subprocess.Popen:
+    """
+    Start a git command whose (bytes) output is read while it runs.
+    
+    LEARNING POINT:
+    - run_git() waits for git to finish and keeps all output in memory
+    - Popen lets the caller iterate over process.stdout line by line,
+      for outputs that can be huge (like a full diff)
+    - Use it as a context manager ("with popen_git(...) as process:")
+      so the pipes are closed and the process is waited for
+    
+    Args:
+        args: Git arguments without the leading "git"
+        repo_path: Path to git repository (used as the working directory)
+    
+    Returns:
+        subprocess.Popen with stdout and stderr as pipes
+    
+    Raises:
+        GitNotInstalledError: If git is not installed on the system
+    """
+    argv = ["git", *args]
+    logger.debug("Running command: %s in %s", " ".join(argv), repo_path)
+    
+    try:
+        return subprocess.Popen(argv, cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        logger.error("Git is not installed on this system")
+        raise GitNotInstalledError()
+
+
+def split_nul_output(output: bytes) -> list[str]:
+    """
+    Split the output of a git command run with -z into fields.
+    
+    LEARNING POINT:
+    - With -z, git ends every field with a NUL byte instead of a newline
+      and never quotes paths (spaces, unicode, even newlines come through as-is)
+    - So one split() replaces the splitlines() + strip() loop
+    - surrogateescape keeps paths that aren't valid UTF-8 instead of crashing;
+      encode them back with the same error handler to get the original bytes
+    
+    Args:
+        output: Raw stdout bytes from git
+    
+    Returns:
+        List of fields (the empty string after the final NUL is dropped)
+    """
+    return output.decode('utf-8', 'surrogateescape').split('\0')[:-1]
+
+
+def _repo_state(repo_path: str) -> tuple:
+    """
+    Cheap stamp of the repository state, used as part of cache keys.
+    
+    LEARNING POINT:
+    - os.stat() costs microseconds; forking git costs milliseconds
+    - .git/HEAD changes on checkout, .git/config when the upstream is set,
+      .git/FETCH_HEAD on every fetch - if none of their mtimes moved, the
+      cached answers are still right
+    - If repo_path isn't the top level (subdirectory, worktree), the files
+      aren't found and the stamp is constant: cached per path, as before
+    
+    Args:
+        repo_path: Resolved path to the repository
+    
+    Returns:
+        Tuple of mtimes in nanoseconds (None for missing files)
+    """
+    git_dir = os.path.join(repo_path, ".git")
+    state = []
+    for name in _REPO_STATE_FILES:
+        try:
+            state.append(os.stat(os.path.join(git_dir, name)).st_mtime_ns)
+        except OSError:
+            state.append(None)
+    return tuple(state)
+
 
 def is_git_repo(repo_path: str = ".") -> bool:
     """
     Check if the given path is a git repository.
     
     LEARNING POINT:
-    - subprocess.run() executes shell commands
+    - run_git() executes git commands (via subprocess.run())
     - check=False means don't raise exception on error
     - returncode == 0 means command succeeded
+    - The answer can't change during a run, so it's cached per resolved
+      path (every analyzer function calls this; only the first one forks git)
+    - The cache key also holds the repo's state stamp (_repo_state), so a
+      long-lived process notices when the repo changes under it
     
     Args:
         repo_path: Path to check (default: current directory)
@@ -39,6 +252,13 @@ def is_git_repo(repo_path: str = ".") -> bool:
         GitNotInstalledError: If git is not installed on the system
         InvalidRepositoryError: If the path does not exist
     """
+    resolved = os.path.realpath(repo_path)
+    return _is_git_repo_cached(resolved, _repo_state(resolved))
+
+
+@lru_cache(maxsize=32)
+def _is_git_repo_cached(repo_path: str, state: tuple) -> bool:
+    """Uncached body of is_git_repo() (repo_path is already resolved; state is only a cache key)."""
     # Path is a class in the pathlib module that represents a file system path
     # It provides methods to manipulate file system paths in a platform-independent way
     path = Path(repo_path)
@@ -48,29 +268,15 @@ def is_git_repo(repo_path: str = ".") -> bool:
         logger.error("Path does not exist: %s", repo_path)
         raise InvalidRepositoryError(repo_path, reason="Path does not exist")
     
-    logger.debug("Running command: git rev-parse --git-dir in %s", repo_path)
+    result = run_git(["rev-parse", "--git-dir"], repo_path, text=True, check=False)
     
-    try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--git-dir"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=False
-        )
-        
-        # returncode == 0 means the command succeeded (it's a git repo)
-        if result.returncode == 0:
-            logger.debug("Valid git repository: %s", repo_path)
-            return True
-        else:
-            logger.debug("Not a git repository: %s", repo_path)
-            return False
-            
-    except FileNotFoundError:
-        # FileNotFoundError is raised ONLY when the 'git' executable is not found
-        logger.error("Git is not installed on this system")
-        raise GitNotInstalledError()
+    # returncode == 0 means the command succeeded (it's a git repo)
+    if result.returncode == 0:
+        logger.debug("Valid git repository: %s", repo_path)
+        return True
+    else:
+        logger.debug("Not a git repository: %s", repo_path)
+        return False
 
 
 def get_remote_branch(repo_path: str = ".") -> str:
@@ -81,6 +287,8 @@ def get_remote_branch(repo_path: str = ".") -> str:
     - git rev-parse --abbrev-ref --symbolic-full-name @{u}
     - @{u} is shorthand for "upstream" (the remote tracking branch)
     - Returns something like "origin/main" or "origin/master"
+    - Cached per resolved path and repo state, like is_git_repo()
+      (editing the upstream rewrites .git/config, fetching writes FETCH_HEAD)
     
     Args:
         repo_path: Path to git repository
@@ -92,41 +300,52 @@ def get_remote_branch(repo_path: str = ".") -> str:
     Raises:
         GitNotInstalledError: If git is not installed on the system
     """
-    logger.debug("Running command: git rev-parse --abbrev-ref --symbolic-full-name @{u} in %s", repo_path)
-    
-    try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        remote = result.stdout.strip()
-        logger.debug("Remote tracking branch: %s", remote)
-        return remote
-        
-    except subprocess.CalledProcessError:
+    resolved = os.path.realpath(repo_path)
+    return _get_remote_branch_cached(resolved, _repo_state(resolved))
+
+
+@lru_cache(maxsize=32)
+def _get_remote_branch_cached(repo_path: str, state: tuple) -> str:
+    """Uncached body of get_remote_branch() (repo_path is already resolved; state is only a cache key)."""
+    result = run_git(["rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}"], repo_path,
+                     text=True, check=False)
+    if result.returncode != 0:
         # No upstream branch set, default to origin/main
         logger.warning("No upstream branch set, defaulting to origin/main")
         return "origin/main"
-    except FileNotFoundError:
-        logger.error("Git is not installed on this system")
-        raise GitNotInstalledError()
+    
+    remote = result.stdout.strip()
+    logger.debug("Remote tracking branch: %s", remote)
+    return remote
 
 
-def get_changed_files(base_ref: str = "HEAD~1", repo_path: str = ".") -> list[str]:
+def _invalidate() -> None:
+    """
+    Clear the is_git_repo() / get_remote_branch() caches.
+    
+    For tests, or after changing a repo's upstream during a run.
+    """
+    _is_git_repo_cached.cache_clear()
+    _get_remote_branch_cached.cache_clear()
+
+
+def get_changed_files(base_ref: str = "HEAD~1", repo_path: str = ".",
+                      git_cache: GitCommandCache | None = None) -> list[str]:
     """
     Get list of files that changed compared to a base reference.
     
     LEARNING POINT:
     - git diff --name-only shows only filenames (not full diff)
     - HEAD~1 means previous commit
-    - check=True raises exception if command fails
+    - A non-zero returncode means the command failed
+    - -z gives NUL-separated, unquoted paths (see split_nul_output)
+    - Pass a GitCommandCache when calling this in a loop: repeated queries
+      for the same ref are answered without starting git again
     
     Args:
         base_ref: Git reference to compare against (default: previous commit)
         repo_path: Path to git repository
+        git_cache: Optional GitCommandCache shared across one pipeline run
     
     Returns:
         List of changed file paths (empty list if no changes or error)
@@ -139,27 +358,13 @@ def get_changed_files(base_ref: str = "HEAD~1", repo_path: str = ".") -> list[st
         logger.warning("Not a git repository, returning empty list: %s", repo_path)
         return []
     
-    logger.debug("Running command: git diff --name-only %s in %s", base_ref, repo_path)
-    
-    try:
-        result = subprocess.run(
-            ["git", "diff", "--name-only", base_ref],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        # Split by newline and filter empty strings
-        files = [f.strip() for f in result.stdout.split('\n') if f.strip()]
-        logger.info("Found %d changed file(s) in %s", len(files), repo_path)
-        return files
-        
-    except subprocess.CalledProcessError as e:
+    result = run_git(["diff", "--name-only", "-z", base_ref], repo_path,
+                     check=False, cache=git_cache)
+    if result.returncode != 0:
         # Git command failed (maybe no commits yet, or invalid ref)
-        logger.warning(
-            "Git diff failed for ref '%s': %s", 
-            base_ref, 
-            e.stderr.strip() if e.stderr else "Unknown error"
-        )
+        logger.warning("Git diff failed for ref '%s': %s", base_ref, git_error_message(result))
         return []
+    
+    files = split_nul_output(result.stdout)
+    logger.info("Found %d changed file(s) in %s", len(files), repo_path)
+    return files
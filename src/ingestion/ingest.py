@@ -0,0 +1,121 @@
+"""
+Push Ingestion Module
+
+LEARNING: One entry point for the whole ingestion stage
+
+What this does:
+- Runs every Stage 1 step (validate, remote branch, commits, changed files,
+  analysis) in one function, sharing a single GitCommandCache
+- Checks the on-disk analysis cache before doing the expensive part
+- Returns one plain dict the orchestrator just reads from
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ingestion import change_analyzer
+from src.ingestion.analysis_cache import (
+    is_analysis_cache_enabled, load_cached_analysis, make_cache_key, resolve_push_range, store_cached_analysis
+)
+from src.ingestion.change_analyzer import analyze_changes_for_docs, get_changed_files_to_push, get_commits_to_push
+from src.ingestion.change_detector import GitCommandCache, get_remote_branch, is_git_repo
+
+# Set up module logger
+logger = logging.getLogger(__name__)
+
+
+def ingest_push(repo_path: str, git_cache: GitCommandCache | None = None) -> dict:
+    """
+    Detect and analyze everything that would be pushed from a repository.
+
+    LEARNING POINT:
+    - Same steps the orchestrator used to call one by one, but all git
+      work goes through ONE GitCommandCache, so no command runs twice
+      (e.g., analyze_changes_for_docs() reuses the changed-file list)
+    - Stops early (with a status) when there's nothing to analyze
+    - The analysis is keyed on (remote SHA, HEAD SHA) in the on-disk
+      cache, so re-running on the same commits skips it entirely
+    - The commit list and file list don't depend on each other, so they
+      run in threads at the same time (one git process each; the GIL is
+      released while waiting on git). Stage 1 then waits for the slower
+      of the two, not their sum
+    - A whole run is six git processes with an upstream set: rev-parse
+      x2 (repo check, branch + SHAs), log, name-status, diff and one
+      cat-file --batch
+
+    Args:
+        repo_path: Path to git repository
+        git_cache: Optional GitCommandCache (a new one is used if omitted)
+
+    Returns:
+        Dict with:
+        - status: 'ok', 'not_a_repo' or 'no_changes'
+        - remote_branch: Remote branch name (None if not a repo)
+        - commits: Commit hashes to push
+        - changed_files: Changed file paths
+        - changes: Result of analyze_changes_for_docs()
+        - from_cache: True if changes came from the analysis cache
+
+    Raises:
+        GitNotInstalledError: If git is not installed on the system
+        InvalidRepositoryError: If the path does not exist
+    """
+    if git_cache is None:
+        git_cache = GitCommandCache()
+
+    result = {
+        'status': 'ok',
+        'remote_branch': None,
+        'commits': [],
+        'changed_files': [],
+        'changes': [],
+        'from_cache': False
+    }
+
+    if not is_git_repo(repo_path):
+        result['status'] = 'not_a_repo'
+        return result
+
+    # The SHAs are only needed for the cache; when it's on, one rev-parse
+    # resolves them together with the branch name
+    if is_analysis_cache_enabled():
+        remote_branch, shas = resolve_push_range(repo_path, git_cache)
+    else:
+        remote_branch, shas = get_remote_branch(repo_path), None
+    result['remote_branch'] = remote_branch
+
+    # Independent git queries
+    queries = (get_commits_to_push, get_changed_files_to_push)
+    if change_analyzer.PARALLEL_GIT_QUERIES:
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = [executor.submit(query, repo_path, remote_branch, git_cache) for query in queries]
+            commits, changed_files = [future.result() for future in futures]
+    else:
+        commits, changed_files = [query(repo_path, remote_branch, git_cache) for query in queries]
+
+    result['commits'] = commits
+    if not commits:
+        result['status'] = 'no_changes'
+        return result
+
+    result['changed_files'] = changed_files
+    if not changed_files:
+        result['status'] = 'no_changes'
+        return result
+
+    # Analyze changes (or reuse the analysis of this exact commit range)
+    cache_key = None
+    if shas is not None:
+        cache_key = make_cache_key(*shas)
+        changes = load_cached_analysis(cache_key)
+        if changes is not None:
+            result['changes'] = changes
+            result['from_cache'] = True
+            return result
+
+    changes = analyze_changes_for_docs(repo_path, remote_branch, git_cache)
+    if cache_key is not None and changes:
+        store_cached_analysis(cache_key, changes)
+    result['changes'] = changes
+
+    return result
@@ -69,13 +69,17 @@ def main():
     pipeline = DocGenPipeline(repo_path=args.repo)
     results = pipeline.run()
     
-    # Print summary
-    print("\n📊 Results Summary:")
-    print(f"   Repository: {results['repo_path']}")
-    print(f"   Remote branch: {results['remote_branch']}")
-    print(f"   Commits to push: {len(results['commits_to_push'])}")
-    print(f"   Files changed: {len(results['changed_files'])}")
-    print(f"   Status: {results['status']}")
+    # Print summary (one write, like the pipeline's per-stage output)
+    summary = [
+        "\n📊 Results Summary:",
+        f"   Repository: {results['repo_path']}",
+        f"   Remote branch: {results['remote_branch']}",
+        f"   Commits to push: {len(results['commits_to_push'])}",
+        f"   Files changed: {len(results['changed_files'])}",
+        f"   Status: {results['status']}",
+    ]
+    sys.stdout.write("\n".join(summary) + "\n")
+    sys.stdout.flush()
     
     # Exit with appropriate code
     if results['status'] in ('no_changes', 'complete'):
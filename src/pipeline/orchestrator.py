@@ -9,17 +9,158 @@ What this does:
 - Calls get_remote_branch() ONCE and passes to all functions (DRY principle)
 """
 
+import heapq
 import logging
-from typing import Dict
-from pathlib import Path
+import os
+import sys
+from typing import Dict, Iterator
 
 from src.exceptions import GitNotInstalledError, InvalidRepositoryError
-from src.ingestion import is_git_repo, get_remote_branch, get_commits_to_push, get_changed_files_to_push, analyze_changes_for_docs
-from src.feature_extraction import count_tokens, chunk_content, needs_chunking, generate_embedding
+from src.ingestion import ingest_push, GitCommandCache, CHANGE_TYPES
 
 # Set up module logger
 logger = logging.getLogger(__name__)
 
+# Status icon per change type (for the Stage 1 summary)
+_CHANGE_EMOJI: Dict[str, str] = {
+    'added': '🆕',
+    'modified': '📝',
+    'deleted': '🗑️',
+    'renamed': '📛'
+}
+
+# Same icons indexed by change['change_type_id'] (built from CHANGE_TYPES,
+# so the two can't get out of step)
+_CHANGE_EMOJI_BY_ID = tuple(_CHANGE_EMOJI.get(change_type, '❓') for change_type in CHANGE_TYPES)
+
+
+def _max_file_tokens_from_env(default: int = 20000) -> int:
+    """
+    Read the DOCGEN_MAX_FILE_TOKENS cap, falling back to the default.
+    
+    LEARNING POINT:
+    - Read at import, so a typo must not stop the CLI from starting:
+      a non-integer or non-positive value logs a warning and is ignored
+    
+    Args:
+        default: Cap used when the variable is unset or invalid
+    
+    Returns:
+        Token cap for a single file
+    """
+    value = os.getenv('DOCGEN_MAX_FILE_TOKENS')
+    if value is None:
+        return default
+    try:
+        max_tokens = int(value)
+    except ValueError:
+        max_tokens = 0
+    if max_tokens <= 0:
+        logger.warning("Ignoring DOCGEN_MAX_FILE_TOKENS=%r (need a positive integer); using %d",
+                       value, default)
+        return default
+    return max_tokens
+
+
+# Files above this many tokens are cut down to their head and tail instead
+# of being chunked whole (generated code, lock files, vendored bundles...)
+MAX_FILE_TOKENS = _max_file_tokens_from_env()
+TRUNCATE_HEAD_TOKENS = 2000
+TRUNCATE_TAIL_TOKENS = 2000
+
+# Files listed in the Stage 1 summary
+SUMMARY_TOP_FILES = 5
+
+
+def _summarize_diff_stats(changes: list[dict], top_n: int = SUMMARY_TOP_FILES) -> tuple[int, int, list[int]]:
+    """
+    Total the diff stats and find the largest changes, in one pass.
+    
+    LEARNING POINT:
+    - One loop collects both totals and the per-file sizes
+    - heapq.nlargest() keeps only top_n candidates: O(N log top_n)
+      instead of sorting every file
+    - Largest files are returned in their original order, so the
+      summary still reads in the order git reported them
+    
+    Args:
+        changes: Result of analyze_changes_for_docs()
+        top_n: How many of the largest changes to pick
+    
+    Returns:
+        (total lines added, total lines deleted, indices of the largest changes)
+    """
+    total_added = 0
+    total_deleted = 0
+    sizes = []
+    for change in changes:
+        stats = change['stats']
+        total_added += stats['added']
+        total_deleted += stats['deleted']
+        sizes.append(stats['added'] + stats['deleted'])
+    
+    largest = heapq.nlargest(top_n, range(len(sizes)), key=sizes.__getitem__)
+    return total_added, total_deleted, sorted(largest)
+
+
+def _extract_file_features(change: dict, content_tokens: int, diff_tokens: int) -> tuple[dict, bool]:
+    """
+    Chunk one analyzed file (Stage 2 work for a single file).
+    
+    LEARNING POINT:
+    - Pure function of its input, so files can be processed in any
+      order - or in parallel - without locks
+    - Token counts come in pre-computed: run() counts every file's content
+      and diff in ONE batched tokenizer call, and the count is handed on
+      to chunk_content() so it isn't tokenized again there
+    - Files over MAX_FILE_TOKENS are cut to their head and tail first
+      (feature['truncated'] is True); the excerpt is still larger than
+      one chunk, so it goes through chunk_content() like any big file
+    
+    Args:
+        change: One entry from analyze_changes_for_docs()
+        content_tokens: Token count of change['content']
+        diff_tokens: Token count of change['diff']
+    
+    Returns:
+        (feature dict, whether the content had to be chunked)
+    """
+    # Imported on use, not at module load (see the Stage 2 block in run())
+    from src.feature_extraction import chunk_content, get_token_limit, truncate_head_tail
+    
+    content = change.get('content', '')
+    diff = change.get('diff', '')
+    
+    # Oversized file: keep head + tail only, never chunk the whole thing
+    truncated = content_tokens > MAX_FILE_TOKENS
+    if truncated:
+        logger.warning("Truncating %s: %d tokens > %d cap (DOCGEN_MAX_FILE_TOKENS)",
+                       change['file_path'], content_tokens, MAX_FILE_TOKENS)
+        content = truncate_head_tail(content, TRUNCATE_HEAD_TOKENS, TRUNCATE_TAIL_TOKENS)
+        chunks = chunk_content(content)
+        was_chunked = len(chunks) > 1
+    else:
+        # Check if chunking needed (same test as needs_chunking, count already known)
+        limit = get_token_limit()
+        was_chunked = content_tokens > limit
+        if was_chunked:
+            logger.info("Content needs chunking: %d tokens > %d limit", content_tokens, limit)
+            chunks = chunk_content(content, total_tokens=content_tokens)
+        else:
+            # Single chunk (whole content)
+            chunks = [{'content': content, 'tokens': content_tokens, 'index': 0}]
+    
+    feature = {
+        'file_path': change['file_path'],
+        'change_type': change['change_type'],
+        'content_tokens': content_tokens,
+        'diff_tokens': diff_tokens,
+        'chunks': chunks,
+        'diff': diff,
+        'truncated': truncated
+    }
+    return feature, was_chunked
+
 
 class DocGenPipeline:
     """
@@ -50,26 +191,74 @@ class DocGenPipeline:
             GitNotInstalledError: If git is not installed
             InvalidRepositoryError: If path is not a valid git repo
         """
-        self.repo_path = str(Path(repo_path).resolve())
+        # Resolved once here; everything downstream reuses this plain string
+        self.repo_path = os.path.realpath(repo_path)
         self.remote_branch = None  # Will be set in run() after validation
+        self._git_cache = None  # Fresh GitCommandCache for every run()
+        self._output = []  # Status lines waiting to be written (see _emit)
         
         logger.info("Pipeline initialized for repo: %s", self.repo_path)
         
+    def _emit(self, line: str = "") -> None:
+        """
+        Queue a status line for the console (like print(), but buffered).
+        
+        LEARNING POINT:
+        - Each print() is its own write to stdout (a syscall when stdout
+          is a terminal); buffering a stage's lines and writing them at
+          once turns ~20 writes per run into a handful
+        """
+        self._output.append(line)
+    
+    def _flush_output(self) -> None:
+        """Write all queued status lines with a single write (at stage boundaries)."""
+        if not self._output:
+            return
+        sys.stdout.write("\n".join(self._output) + "\n")
+        sys.stdout.flush()
+        self._output.clear()
+    
     def run(self) -> Dict:
         """
-        Execute the complete pipeline.
+        Execute the complete pipeline and collect every result.
+        
+        LEARNING POINT:
+        - Compatibility wrapper around run_iter(): same flow, but all
+          features are kept in results['features']
+        - Use run_iter() directly to process features one at a time
+        
+        Returns:
+            Dictionary with pipeline results
+        """
+        features = list(self.run_iter())
+        results = features.pop()  # run_iter() always yields the summary last
+        results['features'] = features
+        return results
+    
+    def run_iter(self) -> Iterator[Dict]:
+        """
+        Execute the complete pipeline, yielding features as they're built.
         
         LEARNING POINT:
         - This method shows the entire flow
         - Each step is clear and sequential
         - remote_branch fetched ONCE and passed to all functions
+        - Stage 1 is a single ingest_push() call; this method only reports
+          on the result (ingest_push handles the analysis cache)
+        - One GitCommandCache per run: later steps reuse git output
+          from earlier ones (e.g., the file list from step 1.4 in 1.5)
+        - A generator: each Stage 2 feature is yielded as soon as it's
+          built, so a consumer (e.g., an indexer) can store it and drop it
+          instead of the pipeline holding every chunk until the end
         
-        Returns:
-            Dictionary with pipeline results
+        Yields:
+            One feature dict per analyzed file, then the results summary
+            dict (same keys as run() returns, minus 'features'); the
+            summary is always the last item and the only one with 'status'
         """
-        print("=" * 60)
-        print("Doc-Gen-Agent Pipeline")
-        print("=" * 60)
+        self._emit("=" * 60)
+        self._emit("Doc-Gen-Agent Pipeline")
+        self._emit("=" * 60)
         
         results = {
             'repo_path': self.repo_path,
@@ -77,148 +266,153 @@ class DocGenPipeline:
             'commits_to_push': [],
             'changed_files': [],
             'changes': [],
-            'features': [],  # Feature extraction results
             'status': 'in_progress'
         }
         
+        self._git_cache = GitCommandCache()
+        
         try:
             # ============== STAGE 1: INGESTION ==============
             
-            # Step 1.1: Validate repository
-            print("\n[1/6] Ingestion: Validating repository...")
-            if not is_git_repo(self.repo_path):
-                print("   ❌ Not a git repository")
+            # Steps 1.1-1.5: validate, remote branch, commits, files, analysis
+            self._emit("\n[1/6] Ingestion: Validating repository...")
+            ingestion = ingest_push(self.repo_path, self._git_cache)
+            
+            if ingestion['status'] == 'not_a_repo':
+                self._emit("   ❌ Not a git repository")
                 results['status'] = 'not_a_repo'
-                return results
-            print("   ✅ Valid git repository")
+                self._flush_output()
+                yield results
+                return
+            self._emit("   ✅ Valid git repository")
             
-            # Step 1.2: Get remote branch (ONCE - DRY principle)
-            self.remote_branch = get_remote_branch(self.repo_path)
+            self.remote_branch = ingestion['remote_branch']
             results['remote_branch'] = self.remote_branch
-            print(f"   ✅ Remote branch: {self.remote_branch}")
+            self._emit(f"   ✅ Remote branch: {self.remote_branch}")
             
-            # Step 1.3: Check commits to push
-            commits = get_commits_to_push(self.repo_path, self.remote_branch)
+            commits = ingestion['commits']
             results['commits_to_push'] = commits
             
             if not commits:
-                print("   ⚠️  No commits to push - already up to date")
+                self._emit("   ⚠️  No commits to push - already up to date")
                 results['status'] = 'no_changes'
-                return results
-            print(f"   ✅ Found {len(commits)} commit(s) to push")
+                self._flush_output()
+                yield results
+                return
+            self._emit(f"   ✅ Found {len(commits)} commit(s) to push")
             
-            # Step 1.4: Get changed files
-            changed_files = get_changed_files_to_push(self.repo_path, self.remote_branch)
+            changed_files = ingestion['changed_files']
             results['changed_files'] = changed_files
             
             if not changed_files:
-                print("   ⚠️  No file changes detected")
+                self._emit("   ⚠️  No file changes detected")
                 results['status'] = 'no_changes'
-                return results
-            print(f"   ✅ Found {len(changed_files)} changed file(s)")
+                self._flush_output()
+                yield results
+                return
+            self._emit(f"   ✅ Found {len(changed_files)} changed file(s)")
             
-            # Step 1.5: Analyze changes
-            changes = analyze_changes_for_docs(self.repo_path, self.remote_branch)
+            changes = ingestion['changes']
             results['changes'] = changes
-            print(f"   ✅ Analyzed {len(changes)} file(s)")
+            cached_note = " (cached)" if ingestion['from_cache'] else ""
+            self._emit(f"   ✅ Analyzed {len(changes)} file(s){cached_note}")
             
-            # Display change summary
-            for change in changes[:5]:
-                emoji = {
-                    'added': '🆕',
-                    'modified': '📝', 
-                    'deleted': '🗑️',
-                    'renamed': '📛'
-                }.get(change['change_type'], '❓')
-                print(f"      {emoji} {change['file_path']} (+{change['stats']['added']}/-{change['stats']['deleted']})")
+            # Display change summary (totals, then the largest changes)
+            total_added, total_deleted, largest = _summarize_diff_stats(changes)
+            self._emit(f"      Lines: +{total_added}/-{total_deleted}")
+            for index in largest:
+                change = changes[index]
+                emoji = _CHANGE_EMOJI_BY_ID[change['change_type_id']]
+                stats = change['stats']
+                self._emit(f"      {emoji} {change['file_path']} (+{stats['added']}/-{stats['deleted']})")
             
-            if len(changes) > 5:
-                print(f"      ... and {len(changes) - 5} more")
+            if len(changes) > len(largest):
+                self._emit(f"      ... and {len(changes) - len(largest)} more")
+            
+            self._flush_output()
             
             # ============== STAGE 2: FEATURE EXTRACTION ==============
-            print("\n[2/6] Feature Extraction: Tokenize & chunk...")
+            self._emit("\n[2/6] Feature Extraction: Tokenize & chunk...")
+            
+            # Imported here, not at the top: loading the tokenizer (and numpy)
+            # is wasted on runs that stop in Stage 1 with nothing to push
+            from src.feature_extraction import count_tokens_batch
             
-            features = []
+            # Count tokens for ALL contents and diffs in one batched call
+            token_counts = count_tokens_batch(
+                [change.get('content', '') for change in changes] +
+                [change.get('diff', '') for change in changes]
+            )
+            content_counts = token_counts[:len(changes)]
+            diff_counts = token_counts[len(changes):]
+            
+            # Stream features out as they're built; keep only what the summary shows.
+            # No thread pool: chunk_content()'s batched tokenizer call already
+            # encodes on several threads, and the rest is cheap dict building
+            feature_count = 0
             total_tokens = 0
             chunked_count = 0
+            preview = []
+            last_feature = None
+            for feature, was_chunked in map(_extract_file_features, changes, content_counts, diff_counts):
+                feature_count += 1
+                total_tokens += feature['content_tokens']
+                chunked_count += was_chunked
+                if len(preview) < 3:
+                    preview.append(feature)
+                last_feature = feature
+                yield feature
             
-            for change in changes:
-                file_path = change['file_path']
-                content = change.get('content', '')
-                diff = change.get('diff', '')
-                
-                # Count tokens
-                content_tokens = count_tokens(content)
-                diff_tokens = count_tokens(diff)
-                total_tokens += content_tokens
-                
-                # Check if chunking needed
-                chunks = []
-                if needs_chunking(content):
-                    chunks = chunk_content(content)
-                    chunked_count += 1
-                else:
-                    # Single chunk (whole content)
-                    chunks = [{'content': content, 'tokens': content_tokens, 'index': 0}]
-                
-                feature = {
-                    'file_path': file_path,
-                    'change_type': change['change_type'],
-                    'content_tokens': content_tokens,
-                    'diff_tokens': diff_tokens,
-                    'chunks': chunks,
-                    'diff': diff
-                }
-                features.append(feature)
-            
-            results['features'] = features
-            
-            print(f"   ✅ Processed {len(features)} file(s)")
-            print(f"      Total tokens: {total_tokens}")
-            print(f"      diff: {diff}")
+            self._emit(f"   ✅ Processed {feature_count} file(s)")
+            self._emit(f"      Total tokens: {total_tokens}")
+            if last_feature is not None:
+                self._emit(f"      diff: {last_feature['diff']}")
             if chunked_count > 0:
-                print(f"      ⚠️  Files chunked: {chunked_count}")
+                self._emit(f"      ⚠️  Files chunked: {chunked_count}")
             
-            for f in features[:3]:
+            for f in preview:
                 chunk_info = f"({len(f['chunks'])} chunks)" if len(f['chunks']) > 1 else ""
-                print(f"      📄 {f['file_path']}: {f['content_tokens']} tokens {chunk_info}")
+                self._emit(f"      📄 {f['file_path']}: {f['content_tokens']} tokens {chunk_info}")
+            
+            self._flush_output()
             
             # ============== STAGE 3: INDEXING ==============
-            print("\n[3/6] Indexing: Store embeddings...")
-            print("   ⏳ Not implemented yet")
+            self._emit("\n[3/6] Indexing: Store embeddings...")
+            self._emit("   ⏳ Not implemented yet")
             
             # ============== STAGE 4: RETRIEVAL ==============
-            print("\n[4/6] Retrieval: Semantic search...")
-            print("   ⏳ Not implemented yet")
+            self._emit("\n[4/6] Retrieval: Semantic search...")
+            self._emit("   ⏳ Not implemented yet")
             
             # ============== STAGE 5: GENERATION ==============
-            print("\n[5/6] Generation: Create documentation...")
-            print("   ⏳ Not implemented yet")
+            self._emit("\n[5/6] Generation: Create documentation...")
+            self._emit("   ⏳ Not implemented yet")
             
             # ============== STAGE 6: POST-PROCESSING ==============
-            print("\n[6/6] Post-processing: Save documentation...")
-            print("   ⏳ Not implemented yet")
+            self._emit("\n[6/6] Post-processing: Save documentation...")
+            self._emit("   ⏳ Not implemented yet")
             
             results['status'] = 'complete'
             
         except GitNotInstalledError as e:
-            print(f"\n   ❌ {e.message}")
+            self._emit(f"\n   ❌ {e.message}")
             results['status'] = 'error'
             results['error'] = str(e.message)
             
         except InvalidRepositoryError as e:
-            print(f"\n   ❌ {e.message}")
+            self._emit(f"\n   ❌ {e.message}")
             results['status'] = 'error'
             results['error'] = str(e.message)
             
         except Exception as e:
             logger.exception("Pipeline error")
-            print(f"\n   ❌ Unexpected error: {str(e)}")
+            self._emit(f"\n   ❌ Unexpected error: {str(e)}")
             results['status'] = 'error'
             results['error'] = str(e)
         
-        print("\n" + "=" * 60)
-        print(f"Pipeline execution: {results['status']}")
-        print("=" * 60)
+        self._emit("\n" + "=" * 60)
+        self._emit(f"Pipeline execution: {results['status']}")
+        self._emit("=" * 60)
+        self._flush_output()
         
-        return results
+        yield results
@@ -0,0 +1,50 @@
+"""
+Tests for pruning the on-disk analysis cache.
+
+Run from the repository root: python -m unittest tests.test_analysis_cache
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from unittest import mock
+
+from src.ingestion import analysis_cache
+
+
+class PruneTest(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        patcher = mock.patch.dict(os.environ, {"DOCGEN_CACHE_DIR": cache_dir})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _keys(self) -> set:
+        with closing(sqlite3.connect(analysis_cache.get_cache_path())) as connection:
+            return {row[0] for row in connection.execute("SELECT key FROM analysis")}
+
+    def test_expired_entries_are_deleted(self):
+        with mock.patch("time.time", return_value=1000.0):
+            analysis_cache.store_cached_analysis("old", [])
+        later = 1000.0 + analysis_cache.ANALYSIS_CACHE_MAX_AGE + 1
+        with mock.patch("time.time", return_value=later):
+            analysis_cache.store_cached_analysis("new", [])
+
+        self.assertEqual(self._keys(), {"new"})
+
+    def test_only_newest_entries_are_kept(self):
+        with mock.patch.object(analysis_cache, "ANALYSIS_CACHE_MAX_ENTRIES", 3):
+            for index in range(5):
+                with mock.patch("time.time", return_value=1000.0 + index):
+                    analysis_cache.store_cached_analysis(f"key{index}", [{'file_path': 'a.py'}])
+
+        self.assertEqual(self._keys(), {"key2", "key3", "key4"})
+        self.assertEqual(analysis_cache.load_cached_analysis("key4"), [{'file_path': 'a.py'}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+"""
+Tests for splitting a combined diff into per-file sections.
+
+Run from the repository root: python -m unittest tests.test_change_analyzer
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from src.ingestion.change_analyzer import (
+    GitCatFile, _diff_header_path, analyze_changes_for_docs, get_all_diffs, get_changed_files_to_push, iter_file_diffs
+)
+
+# Paths that are easy to split wrong: " b/" inside the name, spaces, non-ASCII
+TRICKY_PATHS = ["x b/y.py", "with space.py", "café/ünï.py", "plain.py"]
+
+# Paths git C-quotes in diff headers even with core.quotePath=false
+QUOTED_PATHS = ['quo"te.py', "back\\slash.py", "tab\there.py", "dir b/ü\"x.py"]
+
+
+def _git(repo: str, *args: str) -> str:
+    """Run git in a test repo (with a fixed identity) and return stdout."""
+    result = subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=repo, capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+class DiffHeaderPathTest(unittest.TestCase):
+    def test_symmetric_header(self):
+        for path in TRICKY_PATHS:
+            with self.subTest(path=path):
+                self.assertEqual(_diff_header_path(f"diff --git a/{path} b/{path}"), path)
+
+    def test_rename_header_uses_new_path(self):
+        self.assertEqual(_diff_header_path("diff --git a/old name.py b/new name.py"), "new name.py")
+
+    def test_quoted_header(self):
+        self.assertEqual(_diff_header_path(r'diff --git "a/x\"y" "b/x\"y"'), 'x"y')
+        self.assertEqual(_diff_header_path(r'diff --git "a/t\tb\\c" "b/t\tb\\c"'), "t\tb\\c")
+        self.assertEqual(_diff_header_path(r'diff --git "a/caf\303\251" "b/caf\303\251"'), "café")
+
+    def test_rename_header_with_one_quoted_side(self):
+        self.assertEqual(_diff_header_path(r'diff --git a/plain.py "b/new\"name.py"'), 'new"name.py')
+        self.assertEqual(_diff_header_path(r'diff --git "a/old\"name.py" b/plain.py'), "plain.py")
+
+
+class IterFileDiffsTest(unittest.TestCase):
+    def test_sections_and_stats(self):
+        diff = "".join(
+            f"diff --git a/{path} b/{path}\n"
+            "index 1111111..2222222 100644\n"
+            f"--- a/{path}\n"
+            f"+++ b/{path}\n"
+            "@@ -1,2 +1,2 @@\n"
+            " context\n"
+            "-old\n"
+            "+new\n"
+            "+++not a header\n"
+            for path in TRICKY_PATHS
+        )
+        file_diffs = {entry['file_path']: entry for entry in iter_file_diffs(diff.splitlines(keepends=True))}
+
+        self.assertEqual(list(file_diffs), TRICKY_PATHS)
+        for path in TRICKY_PATHS:
+            with self.subTest(path=path):
+                entry = file_diffs[path]
+                self.assertTrue(entry['diff'].startswith(f"diff --git a/{path} b/{path}\n"))
+                self.assertEqual(entry['stats'], {'added': 2, 'deleted': 1})
+                self.assertEqual(entry['parsed_diff'], {'added': ['new', '++not a header'], 'deleted': ['old']})
+
+
+def _make_repo(test: unittest.TestCase, files: dict) -> tuple[str, str]:
+    """
+    Create a temporary repo with an empty base commit plus one commit adding files.
+
+    Returns:
+        (repo path, SHA of the base commit)
+    """
+    repo = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, repo)
+    _git(repo, "init", "-q")
+    _git(repo, "commit", "-q", "--allow-empty", "-m", "base")
+    base = _git(repo, "rev-parse", "HEAD").strip()
+
+    for path, data in files.items():
+        full_path = os.path.join(repo, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(data)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "add files")
+    return repo, base
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class GetAllDiffsTest(unittest.TestCase):
+    def setUp(self):
+        self.repo, self.base = _make_repo(self, {path: b"one\ntwo\n" for path in TRICKY_PATHS})
+
+    def test_user_diff_config_is_ignored(self):
+        # Settings that change the patch format git prints by default
+        _git(self.repo, "config", "diff.noprefix", "true")
+        _git(self.repo, "config", "diff.mnemonicPrefix", "true")
+        _git(self.repo, "config", "color.ui", "always")
+
+        file_diffs = get_all_diffs(self.repo, self.base)
+
+        self.assertEqual(sorted(file_diffs), sorted(TRICKY_PATHS))
+        for path in TRICKY_PATHS:
+            with self.subTest(path=path):
+                self.assertEqual(file_diffs[path]['stats'], {'added': 2, 'deleted': 0})
+                self.assertEqual(file_diffs[path]['parsed_diff']['added'], ['one', 'two'])
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class CarriageReturnDiffsTest(unittest.TestCase):
+    def test_carriage_returns_are_content(self):
+        repo, base = _make_repo(self, {"cr.txt": b"alpha\rbeta\ngamma\n", "crlf.txt": b"one\r\ntwo\r\n"})
+
+        file_diffs = get_all_diffs(repo, base)
+
+        self.assertIn("+alpha\rbeta\n", file_diffs["cr.txt"]['diff'])
+        self.assertEqual(file_diffs["cr.txt"]['parsed_diff']['added'], ["alpha\rbeta", "gamma"])
+        self.assertIn("+one\r\n", file_diffs["crlf.txt"]['diff'])
+        self.assertEqual(file_diffs["crlf.txt"]['parsed_diff']['added'], ["one", "two"])
+        for path in ("cr.txt", "crlf.txt"):
+            with self.subTest(path=path):
+                self.assertEqual(file_diffs[path]['stats'], {'added': 2, 'deleted': 0})
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class QuotedPathDiffsTest(unittest.TestCase):
+    def test_quoted_paths_match_the_file_list(self):
+        repo, base = _make_repo(self, {path: b"one\n" for path in QUOTED_PATHS})
+
+        file_diffs = get_all_diffs(repo, base)
+
+        self.assertEqual(sorted(file_diffs), sorted(get_changed_files_to_push(repo, base)))
+        self.assertEqual(sorted(file_diffs), sorted(QUOTED_PATHS))
+        for path in QUOTED_PATHS:
+            with self.subTest(path=path):
+                self.assertEqual(file_diffs[path]['parsed_diff']['added'], ["one"])
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class AnalyzeChangesContentTest(unittest.TestCase):
+    def test_content_is_exact_for_every_change_type(self):
+        repo, _ = _make_repo(self, {"modified.txt": b"old\r\n"})
+        base = _git(repo, "rev-parse", "HEAD").strip()
+        files = {
+            "cr.txt": b"alpha\rbeta\ngamma\n",
+            "added_crlf.txt": b"one\r\ntwo\r\n",
+            "modified.txt": b"one\r\ntwo\r\n",
+        }
+        for path, data in files.items():
+            with open(os.path.join(repo, path), "wb") as f:
+                f.write(data)
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "-m", "change files")
+
+        changes = {change['file_path']: change for change in analyze_changes_for_docs(repo, base)}
+
+        self.assertEqual(changes["cr.txt"]['change_type'], 'added')
+        self.assertEqual(changes["modified.txt"]['change_type'], 'modified')
+        for path, data in files.items():
+            with self.subTest(path=path):
+                self.assertEqual(changes[path]['content'], data.decode("utf-8"))
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class GitCatFileTest(unittest.TestCase):
+    def test_missing_paths_with_spaces(self):
+        repo, _ = _make_repo(self, {"sp ace.txt": b"data\n", "dir/file.txt": b"x"})
+
+        with GitCatFile(repo) as catfile:
+            self.assertEqual(catfile.get_bytes("HEAD", "no such file.txt"), b"")
+            self.assertEqual(catfile.get_bytes("HEAD", "sp ace"), b"")  # "HEAD:sp ace missing"
+            self.assertEqual(catfile.get_bytes("HEAD", "a b c"), b"")
+            self.assertEqual(catfile.get_bytes("HEAD", "dir"), b"")  # a tree, not a blob
+            self.assertEqual(catfile.get_bytes("HEAD", "line\nbreak"), b"")
+            # The process is still in sync after the failures above
+            self.assertEqual(catfile.get_bytes("HEAD", "sp ace.txt"), b"data\n")
+            self.assertEqual(catfile.get("HEAD", "dir/file.txt"), "x")
+
+    def test_dead_process_is_restarted(self):
+        repo, _ = _make_repo(self, {"file.txt": b"data\n"})
+
+        with GitCatFile(repo) as catfile:
+            self.assertEqual(catfile.get_bytes("HEAD", "file.txt"), b"data\n")
+            catfile._process.kill()
+            catfile._process.wait()
+
+            with self.assertLogs("src.ingestion.change_analyzer", "WARNING"):
+                self.assertEqual(catfile.get_bytes("HEAD", "file.txt"), b"")
+            self.assertEqual(catfile.get_bytes("HEAD", "file.txt"), b"data\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Tests for the Stage 2 per-file feature extraction.
+
+Run from the repository root: python -m unittest tests.test_orchestrator
+"""
+
+import logging
+import os
+import unittest
+from unittest import mock
+
+from src.feature_extraction import count_tokens
+from src.feature_extraction.chunker import DEFAULT_CHUNK_SIZE
+from src.pipeline import orchestrator
+
+
+def _change(content: str) -> dict:
+    return {
+        "file_path": "big.py",
+        "change_type": "modified",
+        "content": content,
+        "diff": "",
+    }
+
+
+class TruncatedFileTest(unittest.TestCase):
+    def test_excerpt_chunks_fit_the_chunk_size(self):
+        content = "".join(f"value_{i} = compute({i}, {i + 1})\n" for i in range(6000))
+        content_tokens = count_tokens(content)
+        self.assertGreater(content_tokens, orchestrator.MAX_FILE_TOKENS)
+
+        with self.assertLogs(orchestrator.logger, logging.WARNING):
+            feature, was_chunked = orchestrator._extract_file_features(_change(content), content_tokens, 0)
+
+        self.assertTrue(feature["truncated"])
+        self.assertTrue(was_chunked)
+        self.assertGreater(len(feature["chunks"]), 1)
+        for chunk in feature["chunks"]:
+            self.assertLessEqual(chunk["tokens"], DEFAULT_CHUNK_SIZE)
+
+
+class MaxFileTokensFromEnvTest(unittest.TestCase):
+    def _parse(self, value: str) -> int:
+        with mock.patch.dict(os.environ, {"DOCGEN_MAX_FILE_TOKENS": value}):
+            return orchestrator._max_file_tokens_from_env(default=20000)
+
+    def test_valid_value_is_used(self):
+        self.assertEqual(self._parse("5000"), 5000)
+
+    def test_invalid_values_fall_back_to_default(self):
+        for value in ("lots", "", "0", "-10"):
+            with self.subTest(value=value):
+                with self.assertLogs(orchestrator.logger, logging.WARNING):
+                    self.assertEqual(self._parse(value), 20000)
+
+    def test_unset_uses_default(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop("DOCGEN_MAX_FILE_TOKENS", None)
+            self.assertEqual(orchestrator._max_file_tokens_from_env(default=20000), 20000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ Test script to verify installation and setup.
 Run this after installing dependencies to check everything works.
 """
 
+import importlib.util
 import sys
 import os
 
@@ -47,10 +48,10 @@ def test_imports():
         return False
     
     # Optional: sentence-transformers
-    try:
-        import sentence_transformers
+    # (find_spec only locates the package - importing it would load torch)
+    if importlib.util.find_spec("sentence_transformers") is not None:
         print("  ✅ sentence-transformers (optional)")
-    except ImportError:
+    else:
         print("  ⚠️  sentence-transformers (optional - not needed until Phase 5)")
     
     return True